@@ -16,12 +16,23 @@ from .config import (
     Buttons
 )
 
-from .database import Database
-from . import utils
-from . import handlers
+import importlib
 
 __version__ = '1.2'
 
+
+def __getattr__(name):
+    # Database, utils and handlers pull in Motor and Pyrogram, load them on first use
+    if name == 'Database':
+        value = importlib.import_module('.database', __name__).Database
+    elif name in ('utils', 'handlers'):
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     'BOT_TOKEN',
     'API_ID',
@@ -0,0 +1,292 @@
+"""
+Time the Database methods against generated fixtures
+
+Seeds a local MongoDB with --files/--users/--batches documents shaped like
+the ones the bot writes, then times each Database method with no indexes
+and with the indexes from Database.create_indexes(). Read methods are also
+timed as a raw query that only projects the fields callers use, to show
+what fetching whole documents costs.
+
+Results go to a JSON report. Pass --compare with an earlier report to list
+cases that got slower by more than --threshold, the exit code is 1 if any did.
+
+Usage: python -m benchmarks.data_layer --files 1000000 --users 1000000 --report bench.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import settings
+settings.apply()
+
+import config
+from database import Database
+from utils import short_id
+
+INSERT_BATCH = 10000
+ADMIN_COUNT = 20
+
+
+def file_doc(n: int, now: datetime) -> Dict[str, Any]:
+    auto_delete = n % 10 == 0
+    return {
+        "fid": short_id.decode(short_id.generate()),
+        "file_id": n,
+        "file_name": f"file_{n}.mkv",
+        "file_size": random.randint(1, 2000) * 1024 * 1024,
+        "file_type": random.choice(config.SUPPORTED_TYPES),
+        "uploader_id": settings.BENCH_ADMIN_ID + n % ADMIN_COUNT,
+        "message_id": n,
+        "channel_id": config.DB_CHANNEL_ID,
+        "replicas": [],
+        "downloads": random.randint(0, 500),
+        "auto_delete": auto_delete,
+        "auto_delete_time": 30 if auto_delete else None,
+        "uploaded_at": now - timedelta(seconds=n),
+        "file_unique_id": f"unique-{n}",
+        "active_messages": [
+            {"chat_id": n, "message_id": n, "sent_at": now} for _ in range(2 if auto_delete else 0)
+        ],
+    }
+
+
+def user_doc(n: int, now: datetime) -> Dict[str, Any]:
+    return {"user_id": n, "username": f"user{n}", "joined_date": now, "last_active": now}
+
+
+def batch_doc(n: int, now: datetime) -> Dict[str, Any]:
+    return {
+        "bid": short_id.decode(short_id.generate()),
+        "admin_id": settings.BENCH_ADMIN_ID + n % ADMIN_COUNT,
+        "files": [
+            {"file_id": i, "name": f"part_{i}.bin", "size": 1024 * 1024, "type": "document", "message_id": i}
+            for i in range(10)
+        ],
+        "created_at": (now - timedelta(seconds=n)).strftime("%Y-%m-%d %H:%M:%S"),
+        "is_active": True,
+    }
+
+
+async def seed(collection, count: int, make: Callable[[int, datetime], Dict[str, Any]]) -> None:
+    await collection.drop()
+    now = datetime.utcnow()
+    for start in range(0, count, INSERT_BATCH):
+        docs = [make(n, now) for n in range(start, min(start + INSERT_BATCH, count))]
+        await collection.insert_many(docs, ordered=False)
+        print(f"  {collection.name}: {start + len(docs)}/{count}", end="\r")
+    print()
+
+
+async def sample_file_ids(db: Database, count: int) -> List[str]:
+    cursor = db.files.aggregate([{"$sample": {"size": count}}, {"$project": {"fid": 1}}])
+    return [short_id.encode(doc["fid"]) async for doc in cursor]
+
+
+async def sample_page_cursor(db: Database) -> Tuple[int, Tuple[datetime, Any]]:
+    """A random file's uploader and its (uploaded_at, _id), a cursor deep into that uploader's pages"""
+    cursor = db.files.aggregate([{"$sample": {"size": 1}}, {"$project": {"uploader_id": 1, "uploaded_at": 1}}])
+    doc = (await cursor.to_list(1))[0]
+    return doc["uploader_id"], (doc["uploaded_at"], doc["_id"])
+
+
+def build_cases(db: Database, file_ids: List[str],
+                page_cursor: Tuple[int, Tuple[datetime, Any]]) -> Dict[str, Dict[str, Optional[Callable[[int], Awaitable[Any]]]]]:
+    """Case name -> {"method": call, "projected": call}, calls take the iteration number"""
+    admins = [settings.BENCH_ADMIN_ID + n for n in range(ADMIN_COUNT)]
+
+    def pick(i: int) -> str:
+        return file_ids[i % len(file_ids)]
+
+    async def projected_get_file(i):
+        # The fields delivery needs
+        return await db.files.find_one(
+            Database._file_filter(pick(i)),
+            {"message_id": 1, "channel_id": 1, "replicas": 1, "auto_delete": 1, "auto_delete_time": 1},
+        )
+
+    async def projected_get_stats(i):
+        totals = await db.files.aggregate([
+            {"$group": {"_id": None, "size": {"$sum": "$file_size"}, "downloads": {"$sum": "$downloads"}}}
+        ]).to_list(1)
+        return totals, await db.files.estimated_document_count(), await db.users.estimated_document_count()
+
+    async def projected_get_all_users(i):
+        return await db.users.find({}, {"_id": 0, "user_id": 1}).to_list(None)
+
+    async def projected_list_admin_batches(i):
+        cursor = db.batches.find(
+            {"admin_id": admins[i % len(admins)], "is_active": True},
+            {"files": 0},
+        ).sort("created_at", -1)
+        return await cursor.to_list(None)
+
+    async def projected_get_autodelete_files(i):
+        return await db.files.find(
+            {"auto_delete": True},
+            {"fid": 1, "uuid": 1, "auto_delete_time": 1, "active_messages": 1},
+        ).to_list(None)
+
+    return {
+        "get_file": {
+            "method": lambda i: db.get_file(pick(i)),
+            "projected": projected_get_file,
+        },
+        "increment_downloads": {
+            "method": lambda i: db.increment_downloads(pick(i)),
+            "projected": None,
+        },
+        "get_stats": {
+            "method": lambda i: db.get_stats(),
+            "projected": projected_get_stats,
+        },
+        "get_all_users": {
+            "method": lambda i: db.get_all_users(),
+            "projected": projected_get_all_users,
+        },
+        "list_admin_batches": {
+            "method": lambda i: db.list_admin_batches(admins[i % len(admins)]),
+            "projected": projected_list_admin_batches,
+        },
+        # Keyset pages should cost the same at any depth
+        "page_uploader_files": {
+            "method": lambda i: db.page_uploader_files(admins[i % len(admins)]),
+            "deep": lambda i: db.page_uploader_files(page_cursor[0], page_cursor[1]),
+        },
+        "get_autodelete_files": {
+            "method": lambda i: db.get_autodelete_files(),
+            "projected": projected_get_autodelete_files,
+        },
+    }
+
+
+# Full scans are slow at fixture scale, they run fewer times
+SCAN_CASES = {"get_stats", "get_all_users", "get_autodelete_files"}
+
+
+async def time_case(call: Callable[[int], Awaitable[Any]], runs: int) -> Dict[str, float]:
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        await call(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "runs": runs,
+        "mean_ms": round(sum(timings) / runs, 3),
+        "p50_ms": round(timings[runs // 2], 3),
+        "p95_ms": round(timings[min(runs - 1, int(runs * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+async def run_cases(db: Database, cases, indexes: str, args) -> List[Dict[str, Any]]:
+    results = []
+    for name, variants in cases.items():
+        if args.cases and name not in args.cases:
+            continue
+        runs = args.scan_runs if name in SCAN_CASES else args.runs
+        for variant, call in variants.items():
+            if call is None:
+                continue
+            timing = await time_case(call, runs)
+            results.append({"case": name, "variant": variant, "indexes": indexes, **timing})
+            print(f"{name:<22}{variant:<11}{indexes:<12}{timing['p50_ms']:>10.2f}{timing['p95_ms']:>10.2f}")
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """Describe every case whose p50 grew by more than threshold (a fraction)"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["case"], r["variant"], r["indexes"]): r for r in json.load(f)["results"]
+        }
+    regressions = []
+    for result in results:
+        before = baseline.get((result["case"], result["variant"], result["indexes"]))
+        if not before or not before["p50_ms"]:
+            continue
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{result['case']} ({result['variant']}, {result['indexes']} indexes): "
+                f"{before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms (+{change:.0%})"
+            )
+    return regressions
+
+
+async def main(args) -> int:
+    config.MONGO_URI = args.uri
+    config.DATABASE_NAME = args.database
+    db = Database()
+
+    if not args.reuse:
+        print("Seeding fixtures...")
+        await seed(db.files, args.files, file_doc)
+        await seed(db.users, args.users, user_doc)
+        await seed(db.batches, args.batches, batch_doc)
+
+    file_ids = await sample_file_ids(db, args.sample)
+    cases = build_cases(db, file_ids, await sample_page_cursor(db))
+
+    print(f"{'case':<22}{'variant':<11}{'indexes':<12}{'p50 ms':>10}{'p95 ms':>10}")
+    results = []
+    for collection in (db.files, db.users, db.batches):
+        await collection.drop_indexes()
+    results += await run_cases(db, cases, "none", args)
+    await db.create_indexes()
+    results += await run_cases(db, cases, "production", args)
+
+    server = await db.client.server_info()
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "mongo_version": server.get("version"),
+        "fixtures": {"files": args.files, "users": args.users, "batches": args.batches},
+        "results": results,
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+    status = 0
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        status = 1 if regressions else 0
+
+    if not args.keep:
+        await db.client.drop_database(args.database)
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="alphashare_bench")
+    parser.add_argument("--files", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--batches", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=2000, help="Timed calls per point lookup case")
+    parser.add_argument("--scan-runs", type=int, default=3, help="Timed calls per full scan case")
+    parser.add_argument("--sample", type=int, default=1000, help="Distinct files used by lookup cases")
+    parser.add_argument("--cases", nargs="*", help="Only run these cases")
+    parser.add_argument("--report", default="bench_data_layer.json")
+    parser.add_argument("--compare", help="Earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown, 0.2 = 20%%")
+    parser.add_argument("--reuse", action="store_true", help="Skip seeding and use the existing fixtures")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,301 @@
+"""
+Offline load test for the bot handlers
+
+Drives the real handler functions with simulated messages. Telegram is
+replaced by a fake client that adds latency and answers with FloodWait
+when per-chat or global send limits are exceeded, Mongo is either
+mongomock-motor (default, nothing to run) or a local mongod via --uri.
+
+Reports throughput and latency percentiles per scenario:
+  start_hot   concurrent /start <uuid> on one file
+  start       concurrent plain /start
+  stats       concurrent /stats from an admin
+  batch       files sent into one admin batch session
+  broadcast   one /broadcast to every seeded user
+
+With --scheduler sends go through SendScheduler as they do in the bot.
+
+Usage: python -m benchmarks.load --requests 10000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, List
+
+from . import settings
+settings.apply()
+
+from pyrogram.enums import ChatMemberStatus, ChatType, MessageMediaType, ParseMode
+from pyrogram.errors import FloodWait
+from pyrogram.types import Chat, ChatMember, Document, Message, User
+import config
+import database
+from database import Database
+from utils import services, short_id, SendScheduler
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+except ImportError:
+    AsyncMongoMockClient = None
+
+
+class FakeTelegram:
+    """
+    Stand-in for pyrogram.Client, only the methods the handlers call
+
+    Every call sleeps for a jittered latency. Sends are limited per chat
+    and globally over a sliding one-second window, like the Bot API
+    limits, and over-limit calls raise FloodWait instead of being sent.
+    """
+
+    def __init__(self, latency_ms: float, per_chat_rate: int, global_rate: int, flood_wait: int = 1,
+                 scheduler: SendScheduler = None):
+        self.latency = latency_ms / 1000
+        self.per_chat_rate = per_chat_rate
+        self.global_rate = global_rate
+        self.flood_wait = flood_wait
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.flood_waits = 0
+        self._chat_sends: Dict[int, Deque[float]] = defaultdict(deque)
+        self._global_sends: Deque[float] = deque()
+        self._next_id = 1
+        self.scheduler = scheduler
+        # Read by pyrogram types, e.g. User.mention
+        self.parse_mode = ParseMode.DEFAULT
+
+    async def _call(self, method: str, chat_id: int = None) -> int:
+        self.calls[method] += 1
+        if chat_id is not None:
+            now = time.monotonic()
+            for window, limit in ((self._chat_sends[chat_id], self.per_chat_rate), (self._global_sends, self.global_rate)):
+                while window and now - window[0] > 1:
+                    window.popleft()
+                if len(window) >= limit:
+                    self.flood_waits += 1
+                    raise FloodWait(value=self.flood_wait)
+            self._chat_sends[chat_id].append(now)
+            self._global_sends.append(now)
+        await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        self._next_id += 1
+        return self._next_id
+
+    async def _send(self, method: str, chat_id: int) -> int:
+        # Same path as FileShareBot.invoke when the scheduler is on
+        if self.scheduler is None:
+            return await self._call(method, chat_id)
+        return await self.scheduler.submit(chat_id, self._call, method, chat_id)
+
+    def _message(self, message_id: int, chat_id: int, text: str = None) -> Message:
+        return Message(
+            client=self,
+            id=message_id,
+            chat=Chat(id=chat_id, type=ChatType.PRIVATE),
+            text=text,
+        )
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> Message:
+        return self._message(await self._send("send_message", chat_id), chat_id, text)
+
+    async def copy_message(self, chat_id: int, from_chat_id: int, message_id: int, **kwargs) -> Message:
+        return self._message(await self._send("copy_message", chat_id), chat_id)
+
+    async def forward_messages(self, chat_id: int, from_chat_id: int, message_ids, **kwargs):
+        forwarded = self._message(await self._send("forward_messages", chat_id), chat_id)
+        return forwarded if isinstance(message_ids, int) else [forwarded]
+
+    async def edit_message_text(self, chat_id: int, message_id: int, text: str, **kwargs) -> Message:
+        await self._call("edit_message_text")
+        return self._message(message_id, chat_id, text)
+
+    async def delete_messages(self, chat_id: int, message_ids, **kwargs) -> int:
+        await self._call("delete_messages")
+        return 1
+
+    async def get_chat_member(self, chat_id: int, user_id: int) -> ChatMember:
+        await self._call("get_chat_member")
+        return ChatMember(status=ChatMemberStatus.MEMBER)
+
+    async def get_me(self) -> User:
+        await self._call("get_me")
+        return User(id=1, is_bot=True, first_name="Bench", username="bench_bot")
+
+
+def make_message(client: FakeTelegram, user_id: int, text: str = None, **kwargs) -> Message:
+    message = Message(
+        client=client,
+        id=random.randint(1, 2 ** 31),
+        chat=Chat(id=user_id, type=ChatType.PRIVATE),
+        from_user=User(client=client, id=user_id, first_name=f"user{user_id}", username=f"user{user_id}"),
+        text=text,
+        **kwargs
+    )
+    if text and text.startswith("/"):
+        message.command = text[1:].split()
+    return message
+
+
+def make_document(client: FakeTelegram, user_id: int, n: int) -> Message:
+    document = Document(
+        client=client,
+        file_id=f"bench-file-{n}",
+        file_unique_id=f"bench-unique-{n}",
+        file_name=f"file_{n}.bin",
+        mime_type="application/octet-stream",
+        file_size=random.randint(1, 50) * 1024 * 1024,
+    )
+    return make_message(client, user_id, document=document, media=MessageMediaType.DOCUMENT)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_scenario(name: str, calls: List[Callable[[], Awaitable[None]]], concurrency: int, client: FakeTelegram) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = defaultdict(int)
+    flood_waits_before = client.flood_waits
+
+    async def timed(call):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(calls),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(calls) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "flood_waits": client.flood_waits - flood_waits_before,
+    }
+
+
+def setup_database(args) -> Database:
+    if args.uri:
+        config.MONGO_URI = args.uri
+    elif AsyncMongoMockClient is None:
+        raise SystemExit("mongomock-motor is not installed, pip install mongomock-motor or pass --uri")
+    else:
+        database.AsyncIOMotorClient = AsyncMongoMockClient
+    config.DATABASE_NAME = args.database
+    return services.get(Database)
+
+
+async def seed(db: Database, users: int) -> str:
+    for collection in (db.files, db.users, db.batches, db.policies):
+        await collection.delete_many({})
+    try:
+        await db.create_indexes()
+    except Exception as e:
+        # mongomock doesn't support every index option
+        print(f"Skipping indexes: {str(e)}")
+
+    hot_uuid = short_id.generate()
+    await db.add_file({
+        "uuid": hot_uuid,
+        "file_id": 1,
+        "file_name": "hot.bin",
+        "file_size": 10 * 1024 * 1024,
+        "file_type": "document",
+        "uploader_id": settings.BENCH_ADMIN_ID,
+        "message_id": 1,
+    })
+    await db.bulk_upsert_users({
+        user_id: (f"user{user_id}", datetime.utcnow())
+        for user_id in range(1, users + 1)
+    })
+    return hot_uuid
+
+
+async def main(args):
+    db = setup_database(args)
+    # Imported after the database is in place so handlers pick up the shared one
+    from handlers.user.start import start_command, activity
+    from handlers.admin.stats import stats_command
+    from handlers.admin.broadcast import broadcast_command
+    from handlers.admin.batch_upload import BatchUploadSession, handle_batch_file, admin_batch_sessions
+
+    scheduler = None
+    if args.scheduler:
+        # Pace a little under the fake limits, like the real config does
+        scheduler = SendScheduler(global_per_second=args.global_rate * 0.9, chat_interval=1 / args.per_chat_rate, chat_burst=1)
+    client = FakeTelegram(args.latency_ms, args.per_chat_rate, args.global_rate, scheduler=scheduler)
+    hot_uuid = await seed(db, args.users)
+    user_ids = [random.randint(1, args.users) for _ in range(args.requests)]
+
+    scenarios = {
+        "start_hot": lambda: [
+            lambda uid=uid: start_command(client, make_message(client, uid, f"/start {hot_uuid}"))
+            for uid in user_ids
+        ],
+        "start": lambda: [
+            lambda uid=uid: start_command(client, make_message(client, uid, "/start"))
+            for uid in user_ids
+        ],
+        "stats": lambda: [
+            lambda: stats_command(client, make_message(client, settings.BENCH_ADMIN_ID, "/stats"))
+            for _ in range(args.requests)
+        ],
+        "batch": lambda: [
+            lambda n=n: handle_batch_file(client, make_document(client, settings.BENCH_ADMIN_ID, n))
+            for n in range(args.batch_files)
+        ],
+        "broadcast": lambda: [
+            lambda: broadcast_command(client, make_message(
+                client, settings.BENCH_ADMIN_ID, "/broadcast",
+                reply_to_message=make_message(client, settings.BENCH_ADMIN_ID, "Hello from the load test")
+            ))
+        ],
+    }
+
+    print(f"{'scenario':<12}{'requests':>10}{'seconds':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'floods':>8}")
+    for name in args.scenarios:
+        if name == "batch":
+            admin_batch_sessions[settings.BENCH_ADMIN_ID] = BatchUploadSession(settings.BENCH_ADMIN_ID)
+        result = await run_scenario(name, scenarios[name](), args.concurrency, client)
+        print(
+            f"{result['scenario']:<12}{result['requests']:>10}{result['seconds']:>10}{result['throughput']:>10}"
+            f"{result['p50_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}{result['flood_waits']:>8}"
+            f"  {result['error_types'] or ''}"
+        )
+
+    await activity.flush()
+    print(f"Telegram calls: {dict(client.calls)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("BENCH_MONGO_URI"), help="Local mongod, mongomock-motor when omitted")
+    parser.add_argument("--database", default="alphashare_load")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--users", type=int, default=300, help="Seeded users, also the broadcast size")
+    parser.add_argument("--batch-files", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean fake Telegram API latency")
+    parser.add_argument("--per-chat-rate", type=int, default=1, help="Sends per chat per second before FloodWait")
+    parser.add_argument("--global-rate", type=int, default=30, help="Sends per second before FloodWait")
+    parser.add_argument("--scheduler", action="store_true", help="Route sends through SendScheduler")
+    parser.add_argument(
+        "--scenarios", nargs="+", default=["start_hot", "start", "stats", "batch", "broadcast"],
+        choices=["start_hot", "start", "stats", "batch", "broadcast"]
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,22 @@
+"""Placeholder settings so config.py imports without a real deployment"""
+import os
+
+BENCH_ADMIN_ID = 1000
+
+DEFAULTS = {
+    "BOT_TOKEN": "0:bench",
+    "API_ID": "1",
+    "API_HASH": "bench",
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "alphashare_bench",
+    "DB_CHANNEL_ID": "-1001",
+    "OWNER_ID": str(BENCH_ADMIN_ID),
+    "ADMIN_IDS": str(BENCH_ADMIN_ID),
+    "WEB_SERVER": "off",
+}
+
+
+def apply() -> None:
+    """Fill in missing settings, must run before config is imported"""
+    for key, value in DEFAULTS.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,74 @@
+"""
+Compare 36-char uuid string keys with integer short id keys
+
+Seeds two throwaway collections in a local MongoDB, one keyed like the
+old files collection ("uuid": str) and one keyed by short ids ("fid": int),
+then prints index sizes and the average find_one time for each.
+
+Usage: python -m benchmarks.short_ids --count 200000 --lookups 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from motor.motor_asyncio import AsyncIOMotorClient
+from utils import short_id
+
+INSERT_BATCH = 5000
+
+
+async def seed(collection, docs):
+    await collection.drop()
+    for i in range(0, len(docs), INSERT_BATCH):
+        await collection.insert_many(docs[i:i + INSERT_BATCH])
+
+
+async def time_lookups(collection, field, keys):
+    start = time.perf_counter()
+    for key in keys:
+        await collection.find_one({field: key}, {"_id": 1})
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.uri)
+    db = client[args.database]
+    legacy, compact = db.bench_uuid_keys, db.bench_short_keys
+
+    uuids = [str(uuid.uuid4()) for _ in range(args.count)]
+    short_ids = [short_id.generate() for _ in range(args.count)]
+
+    await seed(legacy, [{"uuid": key} for key in uuids])
+    await seed(compact, [{"fid": short_id.decode(key)} for key in short_ids])
+    await legacy.create_index("uuid", unique=True)
+    await compact.create_index("fid", unique=True)
+
+    legacy_stats = await db.command("collStats", legacy.name)
+    compact_stats = await db.command("collStats", compact.name)
+
+    legacy_keys = random.sample(uuids, args.lookups)
+    # Resolving a short id includes decoding it, as Database does
+    compact_keys = [short_id.decode(key) for key in random.sample(short_ids, args.lookups)]
+    legacy_us = await time_lookups(legacy, "uuid", legacy_keys)
+    compact_us = await time_lookups(compact, "fid", compact_keys)
+
+    print(f"Documents: {args.count}, lookups: {args.lookups}")
+    print(f"Link key length: uuid={len(uuids[0])} chars, short id={short_id.LENGTH} chars")
+    print(f"Index size: uuid={legacy_stats['indexSizes']['uuid_1']} B, fid={compact_stats['indexSizes']['fid_1']} B")
+    print(f"Avg lookup: uuid={legacy_us:.1f} us, fid={compact_us:.1f} us")
+
+    if not args.keep:
+        await legacy.drop()
+        await compact.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="alphashare_bench")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded collections")
+    asyncio.run(main(parser.parse_args()))
@@ -18,6 +18,15 @@ DATABASE_NAME = os.getenv("DATABASE_NAME")
 # Channel Configuration
 DB_CHANNEL_ID = int(os.getenv("DB_CHANNEL_ID"))
 
+# Extra storage channels (space separated), uploads are spread over all of them
+DB_CHANNEL_IDS: List[int] = [DB_CHANNEL_ID] + [
+    int(channel_id)
+    for channel_id in os.getenv("EXTRA_DB_CHANNEL_IDS", "").split()
+    if channel_id.lstrip("-").isdigit() and int(channel_id) != DB_CHANNEL_ID
+]
+# Number of channels each file is stored in (primary + replicas)
+STORAGE_REPLICAS = int(os.getenv("STORAGE_REPLICAS", "2"))
+
 # Environment variables
 FSUB_CHNL_ID = os.getenv("FSUB_CHNL_ID", "").strip()
 FSUB_CHNL_LINK = os.getenv("FSUB_CHNL_LINK", "").strip()
@@ -77,9 +86,54 @@ DEVELOPER_LINK = os.getenv("DEVELOPER_LINK", f"https://t.me/{OWNER_USERNAME}")
 SUPPORT_LINK = os.getenv("SUPPORT_LINK", "https://t.me/utkarsh212646")
 
 # For Koyeb/render 
-WEB_SERVER = bool(os.getenv("WEB_SERVER", True))
+WEB_SERVER = os.getenv("WEB_SERVER", "True").lower() in ("true", "on", "1")
 PING_URL = os.getenv("PING_URL", "")
 PING_TIME = int(os.getenv("PING_TIME", "300"))
+# Serve files over HTTP at /dl/<uuid> (on/off), never while PRIVACY_MODE is on.
+# Links are signed and handed out by the bot with each delivery, they expire
+# after STREAM_LINK_TTL seconds or with the delivery's auto-delete, whichever is first
+HTTP_STREAMING = os.getenv("HTTP_STREAMING", "off").lower() == "on"
+STREAM_BASE_URL = os.getenv("STREAM_BASE_URL", PING_URL).rstrip("/")
+STREAM_SECRET = os.getenv("STREAM_SECRET", "") or BOT_TOKEN or ""
+STREAM_LINK_TTL = int(os.getenv("STREAM_LINK_TTL", "3600"))
+# Local disk cache for streamed chunks, 0 disables it
+STREAM_CACHE_DIR = os.getenv("STREAM_CACHE_DIR", "stream_cache")
+STREAM_CACHE_SIZE_MB = int(os.getenv("STREAM_CACHE_SIZE_MB", "1024"))
+
+# Horizontal scaling - each worker handles users where user_id % WORKER_COUNT == WORKER_INDEX
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))
+# Background jobs only run on the worker holding the leader lease
+LEADER_LEASE_TTL = int(os.getenv("LEADER_LEASE_TTL", "30"))
+AUTO_DELETE_SWEEP_INTERVAL = int(os.getenv("AUTO_DELETE_SWEEP_INTERVAL", "60"))
+
+# Auto-delete minutes when no policy is stored, /auto_del stores policies in Mongo
+DEFAULT_AUTO_DELETE = int(os.getenv("DEFAULT_AUTO_DELETE", "30"))
+# Seconds a worker serves cached policies before re-reading them
+AUTO_DELETE_POLICY_TTL = int(os.getenv("AUTO_DELETE_POLICY_TTL", "60"))
+
+# Rate limits for /start and buttons, admins are exempt
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "20"))
+RATE_LIMIT_GLOBAL_PER_SECOND = float(os.getenv("RATE_LIMIT_GLOBAL_PER_SECOND", "25"))
+
+# Outgoing message pacing, kept under Telegram's ~30/s overall and ~1/s per chat.
+# SEND_GLOBAL_PER_SECOND is for the whole bot token, each running worker sends at most an equal share
+SEND_GLOBAL_PER_SECOND = float(os.getenv("SEND_GLOBAL_PER_SECOND", "25"))
+SEND_CHAT_INTERVAL = float(os.getenv("SEND_CHAT_INTERVAL", "1"))
+SEND_CHAT_BURST = int(os.getenv("SEND_CHAT_BURST", "3"))
+
+# Inline search (@bot query): "admins", "all" or "off", needs inline mode enabled in BotFather
+INLINE_SEARCH = os.getenv("INLINE_SEARCH", "admins").lower()
+# Seconds identical inline searches are answered from memory (and cached by Telegram)
+INLINE_CACHE_SECONDS = int(os.getenv("INLINE_CACHE_SECONDS", "30"))
+
+# Bulk admin commands write this many documents per bulk_write and edit their status at most every N seconds
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_PROGRESS_INTERVAL = float(os.getenv("BULK_PROGRESS_INTERVAL", "3"))
+
+# Repeat requests for the same file in the same chat within this many seconds reuse the first delivery
+DELIVERY_DEDUP_WINDOW = int(os.getenv("DELIVERY_DEDUP_WINDOW", "10"))
 
 # Admin IDs - Convert space-separated string to list of integers
 ADMIN_IDS: List[int] = [
@@ -99,6 +153,10 @@ MAX_FILE_SIZE = 2000 * 1024 * 1024
 CURRENT_UTC = "2025-03-24 10:18:35"  # Current UTC time
 AUTO_DELETE_TIME = int(os.getenv("AUTO_DELETE_TIME", "3600"))  # Default 1 hour
 BATCH_SESSION_TIMEOUT = 1800  # 30 minutes
+USER_ACTIVITY_TTL = int(os.getenv("USER_ACTIVITY_TTL", "3600"))  # Write a user at most once per window
+USER_ACTIVITY_FLUSH_INTERVAL = int(os.getenv("USER_ACTIVITY_FLUSH_INTERVAL", "10"))  # Seconds between bulk writes
+SLOW_CALL_MS = int(os.getenv("SLOW_CALL_MS", "2000"))  # Log handler calls slower than this with their breakdown
+SHUTDOWN_TIMEOUT = int(os.getenv("SHUTDOWN_TIMEOUT", "20"))  # Seconds to wait for in-flight handlers on shutdown
 
 # Supported file types and extensions
 SUPPORTED_TYPES = [
@@ -235,6 +293,8 @@ class Messages:
     Click button below, then try again!
     """
 
+    RATE_LIMIT_TEXT = "⏳ You're sending requests too fast, please wait a minute and try again."
+
 class Buttons:
     def start_buttons() -> List[List[Dict[str, str]]]:
         return [
@@ -1,35 +1,123 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from utils import short_id, metrics
 import config
-from typing import Dict, Any, Optional, List
+import re
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Awaitable, Callable
 
 
+@metrics.timed_methods(metrics.MONGO_LATENCY, metrics.MONGO_ERRORS)
 class Database:
+    # Clients opened by every instance, closed together on shutdown
+    _clients = []
+
     def __init__(self):
         self.client = AsyncIOMotorClient(config.MONGO_URI)
+        Database._clients.append(self.client)
         self.db = self.client[config.DATABASE_NAME]
         self.files = self.db.files
         self.users = self.db.users
         self.batches = self.db.batches
+        self.leases = self.db.leases
+        self.policies = self.db.policies
+        # Deliveries with no file document to track them (batches, bulk-deleted files)
+        self.pending_deletions = self.db.pending_deletions
+        # One marker per finished one-off migration
+        self.meta = self.db.meta
         print("Database Connected Successfully!")
 
+    @staticmethod
+    def _file_filter(uuid: str) -> Dict[str, Any]:
+        # Short ids are stored as integers, older uuids as plain strings
+        fid = short_id.decode(uuid)
+        return {"fid": fid} if fid is not None else {"uuid": uuid}
+
+    @staticmethod
+    def _batch_filter(batch_id: str) -> Dict[str, Any]:
+        bid = short_id.decode(batch_id)
+        return {"bid": bid} if bid is not None else {"batch_id": batch_id}
+
+    @staticmethod
+    def _with_public_ids(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if doc:
+            if "fid" in doc:
+                doc["uuid"] = short_id.encode(doc["fid"])
+            if "bid" in doc:
+                doc["batch_id"] = short_id.encode(doc["bid"])
+        return doc
+
+    @staticmethod
+    def _search_terms(file_name: Optional[str], file_type: Optional[str]) -> List[str]:
+        """Lowercased words of the name and type, matched by prefix in search_files"""
+        return sorted(set(re.findall(r"[^\W_]+", f"{file_name or ''} {file_type or ''}".lower())))
+
+    async def create_indexes(self) -> None:
+        try:
+            await self.files.create_index("fid", unique=True, sparse=True)
+            await self.files.create_index(
+                "uuid",
+                unique=True,
+                partialFilterExpression={"uuid": {"$type": "string"}},
+            )
+            await self.files.create_index(
+                "file_unique_id",
+                unique=True,
+                partialFilterExpression={"file_unique_id": {"$type": "string"}},
+            )
+            await self.batches.create_index("bid", unique=True, sparse=True)
+            await self.batches.create_index("batch_id")
+            # Keyset pagination for /myfiles and /mybatches
+            await self.batches.create_index([("admin_id", 1), ("created_at", -1), ("_id", -1)])
+            await self.files.create_index([("uploader_id", 1), ("uploaded_at", -1), ("_id", -1)])
+            await self.users.create_index("user_id", unique=True)
+            await self.policies.create_index([("scope", 1), ("key", 1)], unique=True)
+            # Multikey, lets the auto-delete sweep range-scan due deliveries
+            await self.files.create_index("active_messages.delete_at", sparse=True)
+            await self.pending_deletions.create_index("delete_at")
+            # Multikey, anchored regexes on it become index range scans
+            await self.files.create_index("search_terms")
+            # In order, clear_legacy_autodelete drops what backfill_delete_at reads
+            for migration in (self.backfill_delete_at, self.clear_legacy_autodelete, self.backfill_search_terms):
+                await self.run_migration(migration)
+        except Exception as e:
+            print(f"Database Error (create_indexes): {str(e)}")
+
+    async def run_migration(self, migration: Callable[[], Awaitable[int]]) -> None:
+        """Run a one-off data migration unless the meta collection says it already finished"""
+        marker = {"_id": f"migration:{migration.__name__}"}
+        if await self.meta.find_one(marker):
+            return
+        # Migrations are idempotent, two workers starting together may both run one
+        changed = await migration()
+        await self.meta.update_one(
+            marker, {"$set": {"finished_at": datetime.utcnow(), "changed": changed}}, upsert=True
+        )
+        print(f"Migration {migration.__name__} done, {changed} documents changed")
+
     async def add_batch(self, batch_data: dict):
         try:
-            return await self.batches.insert_one(batch_data)
+            batch_doc = dict(batch_data)
+            batch_doc.update(self._batch_filter(batch_doc.pop("batch_id")))
+            return await self.batches.insert_one(batch_doc)
         except Exception as e:
             print(f"Database Error (add_batch): {str(e)}")
             raise
 
     async def get_batch(self, batch_id: str):
         try:
-            return await self.batches.find_one({"batch_id": batch_id, "is_active": True})
+            batch = await self.batches.find_one({**self._batch_filter(batch_id), "is_active": True})
+            return self._with_public_ids(batch)
         except Exception as e:
             print(f"Database Error (get_batch): {str(e)}")
             raise
 
     async def delete_batch(self, batch_id: str):
         try:
-            return await self.batches.delete_one({"batch_id": batch_id})
+            return await self.batches.delete_one(self._batch_filter(batch_id))
         except Exception as e:
             print(f"Database Error (delete_batch): {str(e)}")
             raise
@@ -37,72 +125,399 @@ class Database:
     async def list_admin_batches(self, admin_id: int):
         try:
             cursor = self.batches.find({"admin_id": admin_id, "is_active": True}).sort("created_at", -1)
-            return await cursor.to_list(length=None)
+            return [self._with_public_ids(batch) for batch in await cursor.to_list(length=None)]
         except Exception as e:
             print(f"Database Error (list_admin_batches): {str(e)}")
             raise
 
+    async def _page(self, collection, match: Dict[str, Any], field: str, project: Dict[str, Any],
+                    cursor: Optional[Tuple[Any, ObjectId]], older: bool, limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page of documents ordered newest first by (field, _id)
+
+        cursor is (field value, _id) of the row next to the page, older picks
+        the side. Seeks through the index instead of skipping, so a deep page
+        costs the same as the first. Returns the page and whether more rows
+        lie beyond it in the same direction.
+        """
+        if cursor:
+            value, oid = cursor
+            op = "$lt" if older else "$gt"
+            match = {**match, "$or": [{field: {op: value}}, {field: value, "_id": {op: oid}}]}
+        direction = -1 if older else 1
+        docs = await collection.aggregate([
+            {"$match": match},
+            {"$sort": {field: direction, "_id": direction}},
+            {"$limit": limit + 1},
+            {"$project": project},
+        ]).to_list(limit + 1)
+        more = len(docs) > limit
+        docs = docs[:limit]
+        if not older:
+            docs.reverse()
+        return [self._with_public_ids(doc) for doc in docs], more
+
+    async def page_uploader_files(self, uploader_id: int, cursor: Optional[Tuple[Any, ObjectId]] = None,
+                                  older: bool = True, limit: int = 10) -> Tuple[List[Dict[str, Any]], bool]:
+        return await self._page(
+            self.files, {"uploader_id": uploader_id}, "uploaded_at",
+            {"fid": 1, "uuid": 1, "file_name": 1, "file_size": 1, "file_type": 1, "downloads": 1, "uploaded_at": 1},
+            cursor, older, limit,
+        )
+
+    async def page_admin_batches(self, admin_id: int, cursor: Optional[Tuple[Any, ObjectId]] = None,
+                                 older: bool = True, limit: int = 10) -> Tuple[List[Dict[str, Any]], bool]:
+        return await self._page(
+            self.batches, {"admin_id": admin_id, "is_active": True}, "created_at",
+            {"bid": 1, "batch_id": 1, "created_at": 1, "file_count": {"$size": {"$ifNull": ["$files", []]}}},
+            cursor, older, limit,
+        )
+
     async def add_file(self, file_data: Dict[str, Any]) -> str:
         file_doc = {
             "file_id": file_data["file_id"],
             "file_name": file_data["file_name"],
             "file_size": file_data["file_size"],
             "file_type": file_data["file_type"],
-            "uuid": file_data["uuid"],
             "uploader_id": file_data["uploader_id"],
             "message_id": file_data["message_id"],
+            "channel_id": file_data.get("channel_id", config.DB_CHANNEL_ID),
+            "replicas": file_data.get("replicas", []),
             "downloads": 0,
             "auto_delete": file_data.get("auto_delete", False),
             "auto_delete_time": file_data.get("auto_delete_time", None),
             "uploaded_at": datetime.utcnow(),
         }
-        await self.files.insert_one(file_doc)
-        return file_doc["uuid"]
+        file_doc["search_terms"] = self._search_terms(file_doc["file_name"], file_doc["file_type"])
+        file_doc.update(self._file_filter(file_data["uuid"]))
+        if file_data.get("file_unique_id"):
+            file_doc["file_unique_id"] = file_data["file_unique_id"]
+        try:
+            await self.files.insert_one(file_doc)
+        except DuplicateKeyError:
+            # The same media was stored concurrently, reuse the existing entry
+            existing = await self.get_file_by_unique_id(file_doc.get("file_unique_id"))
+            if not existing:
+                raise
+            return existing["uuid"]
+        return file_data["uuid"]
 
     async def get_file(self, uuid: str) -> Optional[Dict[str, Any]]:
-        return await self.files.find_one({"uuid": uuid})
+        return self._with_public_ids(await self.files.find_one(self._file_filter(uuid)))
+
+    async def get_file_by_unique_id(self, file_unique_id: str) -> Optional[Dict[str, Any]]:
+        if not file_unique_id:
+            return None
+        return self._with_public_ids(await self.files.find_one({"file_unique_id": file_unique_id}))
 
     async def increment_downloads(self, uuid: str) -> None:
         await self.files.update_one(
-            {"uuid": uuid},
+            self._file_filter(uuid),
             {"$inc": {"downloads": 1}, "$set": {"last_download": datetime.utcnow()}},
         )
 
-    async def set_file_autodelete(self, uuid: str, delete_time: int) -> bool:
+    async def increment_batch_downloads(self, batch_id: str) -> None:
+        await self.batches.update_one(
+            self._batch_filter(batch_id),
+            {"$inc": {"downloads": 1}, "$set": {"last_download": datetime.utcnow()}},
+        )
+
+    async def set_file_autodelete(self, uuid: str, delete_time: Optional[int]) -> bool:
+        """Override a file's auto-delete minutes, None falls back to the uploader/global policy"""
         result = await self.files.update_one(
-            {"uuid": uuid},
-            {
-                "$set": {
-                    "auto_delete": True,
-                    "auto_delete_time": delete_time,
-                    "delete_at": datetime.utcnow(),
-                }
-            },
+            self._file_filter(uuid),
+            {"$set": {"auto_delete": True, "auto_delete_time": delete_time, "auto_delete_override": delete_time is not None}},
+        )
+        return result.matched_count > 0
+
+    async def set_batch_autodelete(self, batch_id: str, delete_time: Optional[int]) -> bool:
+        result = await self.batches.update_one(
+            self._batch_filter(batch_id), {"$set": {"auto_delete_time": delete_time}}
+        )
+        return result.matched_count > 0
+
+    async def get_policies(self) -> List[Dict[str, Any]]:
+        return await self.policies.find({}, {"_id": 0, "scope": 1, "key": 1, "minutes": 1}).to_list(None)
+
+    async def set_policy(self, scope: str, key: Any, minutes: Optional[int]) -> None:
+        if minutes is None:
+            await self.policies.delete_one({"scope": scope, "key": key})
+            return
+        await self.policies.update_one(
+            {"scope": scope, "key": key},
+            {"$set": {"minutes": minutes, "updated_at": datetime.utcnow()}},
+            upsert=True,
         )
-        return result.modified_count > 0
 
     async def get_autodelete_files(self) -> List[Dict[str, Any]]:
         return await self.files.find({"auto_delete": True}).to_list(None)
 
-    async def update_file_message_id(self, uuid: str, message_id: int, chat_id: int) -> None:
+    async def update_file_message_id(self, uuid: str, message_id: int, chat_id: int, delete_at: datetime = None) -> None:
         await self.files.update_one(
-            {"uuid": uuid},
+            self._file_filter(uuid),
             {
                 "$push": {
                     "active_messages": {
                         "chat_id": chat_id,
                         "message_id": message_id,
                         "sent_at": datetime.utcnow(),
+                        "delete_at": delete_at,
                     }
                 }
             },
         )
 
+    async def backfill_delete_at(self) -> int:
+        """Give deliveries recorded before delete_at existed a due time from sent_at"""
+        result = await self.files.update_many(
+            {"auto_delete": True, "active_messages": {"$elemMatch": {"delete_at": {"$exists": False}}}},
+            [{
+                "$set": {
+                    "active_messages": {
+                        "$map": {
+                            "input": "$active_messages",
+                            "as": "m",
+                            "in": {
+                                "$mergeObjects": [
+                                    "$$m",
+                                    {"delete_at": {"$ifNull": [
+                                        "$$m.delete_at",
+                                        {"$add": ["$$m.sent_at", {"$multiply": [{"$ifNull": ["$auto_delete_time", 0]}, 60000]}]},
+                                    ]}},
+                                ]
+                            },
+                        }
+                    }
+                }
+            }],
+        )
+        return result.modified_count
+
+    async def clear_legacy_autodelete(self) -> int:
+        """
+        Drop the auto_delete_time stamped on every file at upload before policies
+        existed, it was the default of the day rather than a per-file choice and
+        would otherwise shadow /auto_del. Real overrides carry auto_delete_override.
+        """
+        result = await self.files.update_many(
+            {"auto_delete_time": {"$ne": None}, "auto_delete_override": {"$exists": False}},
+            {"$unset": {"auto_delete_time": ""}},
+        )
+        return result.modified_count
+
+    async def iter_due_deliveries(self, grace: int = 0, page_size: int = 500) -> AsyncIterator[Tuple[List[Dict[str, Any]], List[UpdateOne]]]:
+        """
+        Page through delivered messages due for deletion more than grace seconds ago
+
+        Yields (due, removals): the due messages as {uuid, chat_id, message_id}
+        and the UpdateOne ops that drop them from their files, to pass to
+        remove_due_deliveries once the messages are deleted.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=grace)
+        cursor = self.files.find(
+            {"active_messages.delete_at": {"$lte": cutoff}},
+            {"fid": 1, "uuid": 1, "active_messages": 1},
+        ).batch_size(page_size)
+
+        due: List[Dict[str, Any]] = []
+        removals: List[UpdateOne] = []
+        async for file in cursor:
+            file = self._with_public_ids(file)
+            for msg in file["active_messages"]:
+                if msg.get("delete_at") and msg["delete_at"] <= cutoff:
+                    due.append({"uuid": file["uuid"], "chat_id": msg["chat_id"], "message_id": msg["message_id"]})
+            removals.append(UpdateOne(
+                {"_id": file["_id"]},
+                {"$pull": {"active_messages": {"delete_at": {"$lte": cutoff}}}},
+            ))
+            if len(removals) >= page_size:
+                yield due, removals
+                due, removals = [], []
+        if removals:
+            yield due, removals
+
+    async def remove_due_deliveries(self, removals: List[UpdateOne]) -> int:
+        if not removals:
+            return 0
+        result = await self.files.bulk_write(removals, ordered=False)
+        return result.modified_count
+
+    async def add_pending_deletions(self, entries: List[Dict[str, Any]]) -> None:
+        """Queue {chat_id, message_id, delete_at} deliveries for the sweep"""
+        if entries:
+            await self.pending_deletions.insert_many(entries, ordered=False)
+
+    async def iter_due_pending_deletions(self, grace: int = 0, page_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Pages of pending deletions due more than grace seconds ago"""
+        cutoff = datetime.utcnow() - timedelta(seconds=grace)
+        cursor = self.pending_deletions.find(
+            {"delete_at": {"$lte": cutoff}}, {"_id": 0, "chat_id": 1, "message_id": 1}
+        ).batch_size(page_size)
+        due: List[Dict[str, Any]] = []
+        async for entry in cursor:
+            due.append(entry)
+            if len(due) >= page_size:
+                yield due
+                due = []
+        if due:
+            yield due
+
+    async def remove_pending_deletions(self, chat_id: int, message_ids: List[int]) -> int:
+        result = await self.pending_deletions.delete_many({"chat_id": chat_id, "message_id": {"$in": message_ids}})
+        return result.deleted_count
+
+    async def backfill_search_terms(self, chunk_size: int = 500) -> int:
+        """Index names of files stored before search_terms existed"""
+        updated = 0
+        ops: List[UpdateOne] = []
+        cursor = self.files.find(
+            {"search_terms": {"$exists": False}}, {"file_name": 1, "file_type": 1}
+        ).batch_size(chunk_size)
+        async for file in cursor:
+            terms = self._search_terms(file.get("file_name"), file.get("file_type"))
+            ops.append(UpdateOne({"_id": file["_id"]}, {"$set": {"search_terms": terms}}))
+            if len(ops) >= chunk_size:
+                updated += (await self.files.bulk_write(ops, ordered=False)).modified_count
+                ops = []
+        if ops:
+            updated += (await self.files.bulk_write(ops, ordered=False)).modified_count
+        return updated
+
+    async def search_files(self, query: str, after: str = None, limit: int = 20) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Newest files whose name or type has a word starting with each query word
+
+        Query words shorter than two characters are ignored, a query with no
+        longer word returns nothing.
+
+        after is the offset returned with the previous page, the returned
+        offset is empty once there are no more results.
+        """
+        # One-letter prefixes match most of the library, they'd only slow the query down
+        terms = [t for t in self._search_terms(query, None) if len(t) >= 2]
+        # Past five words, keep the longest, they narrow the results the most
+        terms = sorted(terms, key=len, reverse=True)[:5]
+        if not terms:
+            return [], ""
+        # The planner either turns one of the regexes (whichever wins its trial run)
+        # into search_terms index bounds, reads every file matching it, filters the
+        # rest per document and sorts by _id in memory, or walks the _id index from
+        # `after` and filters every file until the page is full. A page is not a
+        # fixed cost, it grows with how common the words are.
+        filters: Dict[str, Any] = {"$and": [{"search_terms": re.compile(f"^{re.escape(t)}")} for t in terms]}
+        if after:
+            try:
+                filters["_id"] = {"$lt": ObjectId(after)}
+            except InvalidId:
+                return [], ""
+        cursor = self.files.find(
+            filters,
+            {"fid": 1, "uuid": 1, "file_name": 1, "file_type": 1, "file_size": 1, "downloads": 1},
+        ).sort("_id", -1).limit(limit + 1)
+        files = [self._with_public_ids(file) for file in await cursor.to_list(length=limit + 1)]
+        # One extra row tells us whether another page exists without a count
+        next_offset = str(files[limit - 1]["_id"]) if len(files) > limit else ""
+        return files[:limit], next_offset
+
+    def _bulk_target(self, kind: str, uploader_id: int = None, older_than_days: float = None,
+                     file_type: str = None) -> Tuple[Any, Dict[str, Any]]:
+        """Collection and filter for bulk admin operations, kind is files or batches"""
+        filters: Dict[str, Any] = {}
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days) if older_than_days is not None else None
+        if kind == "files":
+            if uploader_id is not None:
+                filters["uploader_id"] = uploader_id
+            if file_type:
+                filters["file_type"] = file_type
+            if cutoff:
+                filters["uploaded_at"] = {"$lt": cutoff}
+            return self.files, filters
+        if kind == "batches":
+            if file_type:
+                raise ValueError("Batches can't be filtered by type")
+            if uploader_id is not None:
+                filters["admin_id"] = uploader_id
+            if cutoff:
+                # Stored as "%Y-%m-%d %H:%M:%S", which sorts in time order
+                filters["created_at"] = {"$lt": cutoff.strftime("%Y-%m-%d %H:%M:%S")}
+            return self.batches, filters
+        raise ValueError(f"Unknown kind: {kind}")
+
+    async def _stream_ids(self, collection, filters: Dict[str, Any], chunk_size: int) -> AsyncIterator[List[ObjectId]]:
+        ids: List[ObjectId] = []
+        async for doc in collection.find(filters, {"_id": 1}).batch_size(chunk_size):
+            ids.append(doc["_id"])
+            if len(ids) >= chunk_size:
+                yield ids
+                ids = []
+        if ids:
+            yield ids
+
+    async def count_matching(self, kind: str, **criteria) -> int:
+        collection, filters = self._bulk_target(kind, **criteria)
+        return await collection.count_documents(filters)
+
+    async def bulk_delete(self, kind: str, chunk_size: int = 1000, **criteria) -> AsyncIterator[int]:
+        """Delete matching files or batches a chunk at a time, yields how many each chunk removed"""
+        collection, filters = self._bulk_target(kind, **criteria)
+        async for ids in self._stream_ids(collection, filters, chunk_size):
+            if kind == "files":
+                # Their deliveries still have to be deleted, hand them to the sweep first
+                await self.add_pending_deletions([
+                    {"chat_id": msg["chat_id"], "message_id": msg["message_id"], "delete_at": msg["delete_at"]}
+                    async for file in collection.find(
+                        {"_id": {"$in": ids}, "active_messages.delete_at": {"$type": "date"}}, {"active_messages": 1}
+                    )
+                    for msg in file["active_messages"] if msg.get("delete_at")
+                ])
+            result = await collection.bulk_write([DeleteOne({"_id": _id}) for _id in ids], ordered=False)
+            yield result.deleted_count
+
+    async def bulk_set_autodelete(self, kind: str, delete_time: Optional[int], chunk_size: int = 1000,
+                                  **criteria) -> AsyncIterator[int]:
+        """Set auto_delete_time on matching files or batches, None returns them to the policy"""
+        collection, filters = self._bulk_target(kind, **criteria)
+        update = {"$set": {"auto_delete_time": delete_time}}
+        if kind == "files":
+            update["$set"]["auto_delete"] = True
+            update["$set"]["auto_delete_override"] = delete_time is not None
+        async for ids in self._stream_ids(collection, filters, chunk_size):
+            result = await collection.bulk_write([UpdateOne({"_id": _id}, update) for _id in ids], ordered=False)
+            yield result.matched_count
+
+    async def iter_export(self, kind: str, page_size: int = 1000, **criteria) -> AsyncIterator[Dict[str, Any]]:
+        """Metadata of matching files or batches, streamed from the cursor"""
+        collection, filters = self._bulk_target(kind, **criteria)
+        if kind == "files":
+            cursor = collection.find(filters, {
+                "fid": 1, "uuid": 1, "file_name": 1, "file_type": 1, "file_size": 1, "uploader_id": 1,
+                "downloads": 1, "auto_delete_time": 1, "uploaded_at": 1,
+            }).batch_size(page_size)
+        else:
+            cursor = collection.aggregate([
+                {"$match": filters},
+                {"$project": {
+                    "bid": 1, "batch_id": 1, "admin_id": 1, "created_at": 1, "is_active": 1, "auto_delete_time": 1,
+                    "file_count": {"$size": {"$ifNull": ["$files", []]}},
+                }},
+            ], batchSize=page_size)
+        async for doc in cursor:
+            doc = self._with_public_ids(doc)
+            for internal in ("_id", "fid", "bid"):
+                doc.pop(internal, None)
+            yield doc
+
     async def remove_file_message(self, uuid: str, chat_id: int, message_id: int) -> None:
         await self.files.update_one(
-            {"uuid": uuid}, {"$pull": {"active_messages": {"chat_id": chat_id, "message_id": message_id}}}
+            self._file_filter(uuid), {"$pull": {"active_messages": {"chat_id": chat_id, "message_id": message_id}}}
         )
 
+    @classmethod
+    def close_all(cls) -> None:
+        for client in cls._clients:
+            client.close()
+        cls._clients.clear()
+
     async def get_stats(self) -> Dict[str, Any]:
         total_files = await self.files.count_documents({})
         total_users = await self.users.count_documents({})
@@ -121,33 +536,34 @@ class Database:
             "active_autodelete_files": await self.files.count_documents({"auto_delete": True}),
         }
 
+    @staticmethod
+    def _user_update(username: Optional[str], seen_at: datetime) -> Dict[str, Any]:
+        return {
+            "$set": {"username": username, "last_active": seen_at},
+            "$setOnInsert": {"joined_date": seen_at},
+        }
+
     async def add_user(self, user_id: int, username: str = None) -> None:
         await self.users.update_one(
             {"user_id": user_id},
-            {
-                "$set": {
-                    "username": username,
-                    "joined_date": datetime.utcnow(),
-                    "last_active": datetime.utcnow(),
-                }
-            },
+            self._user_update(username, datetime.utcnow()),
             upsert=True,
         )
 
+    async def bulk_upsert_users(self, users: Dict[int, Tuple[Optional[str], datetime]]) -> None:
+        if not users:
+            return
+        await self.users.bulk_write(
+            [
+                UpdateOne({"user_id": user_id}, self._user_update(username, seen_at), upsert=True)
+                for user_id, (username, seen_at) in users.items()
+            ],
+            ordered=False,
+        )
+
     async def get_all_users(self) -> List[Dict[str, Any]]:
         return await self.users.find({}).to_list(None)
 
     async def get_file_messages(self, uuid: str) -> List[Dict[str, Any]]:
         file = await self.get_file(uuid)
         return file.get("active_messages", []) if file else []
-
-    async def check_autodelete_status(self, uuid: str) -> Optional[Dict[str, Any]]:
-        file = await self.get_file(uuid)
-        if file and file.get("auto_delete"):
-            delete_time = file.get("auto_delete_time", 0)
-            sent_time = file.get("delete_at")
-            if sent_time:
-                time_diff = (datetime.utcnow() - sent_time).total_seconds() / 60
-                if time_diff >= delete_time:
-                    return {"should_delete": True, "messages": file.get("active_messages", [])}
-        return None
@@ -1,6 +1,7 @@
 from .admin.auto_delete import auto_delete_command
 from .admin.broadcast import broadcast_command
 from .admin.stats import stats_command
+from .admin.perf import perf_command
 from .admin.upload import upload_command
 from .shortner import short_url_command
 from .user.start import start_command
@@ -11,6 +12,7 @@ __all__ = [
     'auto_delete_command',
     'broadcast_command',
     'stats_command',
+    'perf_command',
     'upload_command',
     'short_url_command',
     'start_command',
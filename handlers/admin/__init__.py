@@ -1,4 +1,4 @@
-from .message_delete import schedule_message_deletion
+from ..utils.message_delete import schedule_message_deletion
 
 __all__ = [
     'schedule_message_deletion'
@@ -1,50 +1,94 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from utils import is_admin
-import config
+from database import Database
+from utils import is_admin, services
+from utils.auto_delete_policy import GLOBAL, UPLOADER
+from ..utils.delivery import policies
+
+db = services.lazy(Database)
+
+USAGE_TEXT = (
+    "**📝 Auto Delete Command Usage**\n\n"
+    "`/auto_del <minutes>` - Default for all files\n"
+    "`/auto_del user <user_id> <minutes>` - Files uploaded by a user\n"
+    "`/auto_del file <file_id> <minutes>` - One file\n"
+    "`/auto_del batch <batch_id> <minutes>` - One batch\n\n"
+    "**Examples:**\n"
+    "• `/auto_del 5` - Set auto-delete to 5 minutes\n"
+    "• `/auto_del 60` - Set auto-delete to 1 hour\n"
+    "• `/auto_del 1440` - Set auto-delete to 24 hours\n"
+    "• `/auto_del file <file_id> default` - Drop a file's own setting\n\n"
+    "**Note:** Time must be between 1 and 10080 minutes (7 days)"
+)
+
+def parse_minutes(value: str):
+    """Minutes as int, None for `default`, raises ValueError otherwise"""
+    if value.lower() == "default":
+        return None
+    minutes = int(value)
+    if not 1 <= minutes <= 10080:
+        raise ValueError("out of range")
+    return minutes
 
 @Client.on_message(filters.command("auto_del"))
 async def auto_delete_command(client: Client, message: Message):
     if not is_admin(message):
         await message.reply_text("⚠️ You are not authorized to use this command!")
         return
-    
-    if len(message.command) != 2:
-        await message.reply_text(
-            "**📝 Auto Delete Command Usage**\n\n"
-            "`/auto_del <minutes>`\n\n"
-            "**Examples:**\n"
-            "• `/auto_del 5` - Set auto-delete to 5 minutes\n"
-            "• `/auto_del 60` - Set auto-delete to 1 hour\n"
-            "• `/auto_del 1440` - Set auto-delete to 24 hours\n\n"
-            "**Note:** Time must be between 1 and 10080 minutes (7 days)"
-        )
+
+    args = message.command[1:]
+    if len(args) == 1:
+        scope, target, value = GLOBAL, None, args[0]
+    elif len(args) == 3 and args[0].lower() in ("user", "file", "batch"):
+        scope, target, value = args[0].lower(), args[1], args[2]
+    else:
+        await message.reply_text(USAGE_TEXT)
         return
-    
+
     try:
-        delete_time = int(message.command[1])
-        if not 1 <= delete_time <= 10080:
-            await message.reply_text(
-                "❌ **Invalid Time Range**\n\n"
-                "Time must be between 1 and 10080 minutes (7 days)\n"
-                "Examples:\n"
-                "• 5 = 5 minutes\n"
-                "• 60 = 1 hour\n"
-                "• 1440 = 24 hours"
-            )
-            return
-        
-        config.DEFAULT_AUTO_DELETE = delete_time
+        delete_time = parse_minutes(value)
+    except ValueError:
         await message.reply_text(
-            f"✅ **Auto-delete time updated**\n\n"
-            f"New files will be automatically deleted after {delete_time} minutes\n"
-            f"Time in other units:\n"
-            f"• Hours: {delete_time/60:.1f}\n"
-            f"• Days: {delete_time/1440:.1f}"
+            "❌ **Invalid Time**\n\n"
+            "Time must be a number of minutes between 1 and 10080 (7 days), or `default`\n"
+            "Examples:\n"
+            "• 5 = 5 minutes\n"
+            "• 60 = 1 hour\n"
+            "• 1440 = 24 hours"
         )
-    except ValueError:
+        return
+
+    if scope == GLOBAL:
+        await policies.set(GLOBAL, None, delete_time)
+        applies_to = "All files without their own setting"
+    elif scope == "user":
+        if not target.isdigit():
+            await message.reply_text("❌ **Invalid user id**")
+            return
+        await policies.set(UPLOADER, int(target), delete_time)
+        applies_to = f"Files uploaded by `{target}`"
+    elif scope == "file":
+        if not await db.set_file_autodelete(target, delete_time):
+            await message.reply_text("❌ File not found!")
+            return
+        applies_to = f"File `{target}`"
+    else:
+        if not await db.set_batch_autodelete(target, delete_time):
+            await message.reply_text("❌ Batch not found!")
+            return
+        applies_to = f"Batch `{target}`"
+
+    if delete_time is None:
         await message.reply_text(
-            "❌ **Invalid Time Format**\n\n"
-            "Please provide a valid number of minutes\n"
-            "Example: `/auto_del 30` for 30 minutes"
+            f"✅ **Auto-delete time reset**\n\n"
+            f"{applies_to} will follow the broader setting again"
         )
+        return
+
+    await message.reply_text(
+        f"✅ **Auto-delete time updated**\n\n"
+        f"{applies_to}: deleted after {delete_time} minutes\n"
+        f"Time in other units:\n"
+        f"• Hours: {delete_time/60:.1f}\n"
+        f"• Days: {delete_time/1440:.1f}"
+    )
@@ -1,20 +1,21 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup
-from uuid import uuid4
 import time
 from datetime import datetime
 from database import Database
 from config import Messages, ADMIN_IDS, DB_CHANNEL_ID
 from handlers.utils import get_size_formatted
+from utils import StorageManager, short_id, services
 
 # Store batch upload sessions
 admin_batch_sessions = {}
+storage = StorageManager()
 
 class BatchUploadSession:
     def __init__(self, admin_id: int):
         self.admin_id = admin_id
         self.files = []
-        self.batch_id = str(uuid4())[:8]
+        self.batch_id = short_id.generate()
         self.start_time = time.time()
         self.created_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -75,7 +76,7 @@ async def finish_batch_upload(client: Client, message: Message):
     
     try:
         # Store batch information in database
-        db = Database()
+        db = services.get(Database)
         batch_data = {
             "batch_id": session.batch_id,
             "admin_id": admin_id,
@@ -158,15 +159,16 @@ async def handle_batch_file(client: Client, message: Message):
         return
     
     try:
-        # Forward file to database channel
-        file_msg = await message.forward(DB_CHANNEL_ID)
+        # Forward file to the storage channels owning this batch
+        stored = await storage.store(message, f"{session.batch_id}:{len(session.files)}")
+        file_msg_id = stored["message_id"]
         
         # Get file information
         file_info = {}
         
         if message.document:
             file_info = {
-                "file_id": file_msg.id,
+                "file_id": file_msg_id,
                 "name": message.document.file_name,
                 "size": message.document.file_size,
                 "size_formatted": get_size_formatted(message.document.file_size),
@@ -176,8 +178,8 @@ async def handle_batch_file(client: Client, message: Message):
             }
         elif message.video:
             file_info = {
-                "file_id": file_msg.id,
-                "name": message.video.file_name or f"video_{file_msg.id}.mp4",
+                "file_id": file_msg_id,
+                "name": message.video.file_name or f"video_{file_msg_id}.mp4",
                 "size": message.video.file_size,
                 "size_formatted": get_size_formatted(message.video.file_size),
                 "mime_type": message.video.mime_type,
@@ -186,8 +188,8 @@ async def handle_batch_file(client: Client, message: Message):
             }
         elif message.audio:
             file_info = {
-                "file_id": file_msg.id,
-                "name": message.audio.file_name or f"audio_{file_msg.id}.mp3",
+                "file_id": file_msg_id,
+                "name": message.audio.file_name or f"audio_{file_msg_id}.mp3",
                 "size": message.audio.file_size,
                 "size_formatted": get_size_formatted(message.audio.file_size),
                 "mime_type": message.audio.mime_type,
@@ -196,8 +198,8 @@ async def handle_batch_file(client: Client, message: Message):
             }
         elif message.photo:
             file_info = {
-                "file_id": file_msg.id,
-                "name": f"photo_{file_msg.id}.jpg",
+                "file_id": file_msg_id,
+                "name": f"photo_{file_msg_id}.jpg",
                 "size": message.photo.file_size,
                 "size_formatted": get_size_formatted(message.photo.file_size),
                 "mime_type": "image/jpeg",
@@ -208,6 +210,7 @@ async def handle_batch_file(client: Client, message: Message):
             await message.reply_text(f"❌ Unsupported file type")
             return
         
+        file_info.update(stored)
         session.files.append(file_info)
         
         # Calculate total size
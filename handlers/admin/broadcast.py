@@ -1,10 +1,14 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
+from pyrogram.errors import FloodWait
 from database import Database
-from utils import is_admin
+from utils import is_admin, metrics, services, send_scheduler
 import asyncio
 
-db = Database()
+db = services.lazy(Database)
+
+# Sends handed to the scheduler at once
+BROADCAST_CHUNK = 100
 
 @Client.on_message(filters.command("broadcast") & filters.reply)
 async def broadcast_command(client: Client, message: Message):
@@ -21,21 +25,35 @@ async def broadcast_command(client: Client, message: Message):
     users = await db.get_all_users()
     success = 0
     failed = 0
-    
-    for user in users:
-        try:
-            if replied_msg.text:
-                await client.send_message(user["user_id"], replied_msg.text)
-            elif replied_msg.media:
-                await client.copy_message(
-                    chat_id=user["user_id"],
-                    from_chat_id=replied_msg.chat.id,
-                    message_id=replied_msg.message_id
-                )
-            success += 1
-        except:
-            failed += 1
-        await asyncio.sleep(0.1)
+
+    async def send_to(user_id: int):
+        if replied_msg.text:
+            await client.send_message(user_id, replied_msg.text)
+        elif replied_msg.media:
+            await client.copy_message(
+                chat_id=user_id,
+                from_chat_id=replied_msg.chat.id,
+                message_id=replied_msg.id
+            )
+
+    # The send scheduler paces these behind interactive deliveries,
+    # so they can be handed over a chunk at a time instead of one by one
+    with send_scheduler.priority(send_scheduler.BULK):
+        for i in range(0, len(users), BROADCAST_CHUNK):
+            chunk = users[i:i + BROADCAST_CHUNK]
+            results = await asyncio.gather(
+                *(send_to(user["user_id"]) for user in chunk),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    failed += 1
+                    metrics.BROADCAST_MESSAGES.inc("failed")
+                    if isinstance(result, FloodWait):
+                        metrics.FLOOD_WAITS.inc("broadcast")
+                else:
+                    success += 1
+                    metrics.BROADCAST_MESSAGES.inc("ok")
     
     broadcast_text = (
         "✅ **Broadcast Completed**\n\n"
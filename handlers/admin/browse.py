@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from database import Database
+from utils import is_admin, humanbytes, services
+from ..callback_handler import router
+import config
+
+db = services.lazy(Database)
+
+PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1)
+
+# Cursor = the (sort value, _id) of the row next to the wanted page, carried in
+# the button as <o|n><d|s><value>.<_id>: older/newer side, datetime in ms or string
+
+def encode_cursor(doc: Dict[str, Any], field: str, older: bool) -> str:
+    value = doc[field]
+    if isinstance(value, datetime):
+        value = f"d{(value - EPOCH) // timedelta(milliseconds=1)}"
+    else:
+        value = f"s{value}"
+    return f"{'o' if older else 'n'}{value}.{doc['_id']}"
+
+def parse_cursor(payload: str) -> Tuple[bool, Tuple[Any, ObjectId]]:
+    """Raises ValueError on tampered data, the router turns that into an alert"""
+    if len(payload) < 2 or payload[0] not in "on" or payload[1] not in "ds":
+        raise ValueError("bad cursor")
+    value, _, oid = payload[2:].rpartition(".")
+    if payload[1] == "d":
+        value = EPOCH + timedelta(milliseconds=int(value))
+    try:
+        return payload[0] == "o", (value, ObjectId(oid))
+    except InvalidId as e:
+        raise ValueError(str(e))
+
+def nav_buttons(prefix: str, docs: List[Dict[str, Any]], field: str,
+                has_newer: bool, has_older: bool) -> Optional[InlineKeyboardMarkup]:
+    row = []
+    if has_newer:
+        row.append(InlineKeyboardButton("⬅️ Newer", callback_data=f"{prefix}_{encode_cursor(docs[0], field, False)}"))
+    if has_older:
+        row.append(InlineKeyboardButton("Older ➡️", callback_data=f"{prefix}_{encode_cursor(docs[-1], field, True)}"))
+    return InlineKeyboardMarkup([row]) if row else None
+
+async def files_page(user_id: int, cursor=None, older: bool = True):
+    files, more = await db.page_uploader_files(user_id, cursor, older, PAGE_SIZE)
+    if not files:
+        return "📁 **Your Files**\n\nNo files found.", None
+    # Coming from a page means there is something on that side
+    has_newer, has_older = (cursor is not None, more) if older else (more, True)
+    lines = ["📁 **Your Files**\n"]
+    for file in files:
+        lines.append(
+            f"• `{file['file_name'][:60]}` — {humanbytes(file.get('file_size') or 0)}, {file.get('downloads', 0)} 📥\n"
+            f"  `https://t.me/{config.BOT_USERNAME}?start={file['uuid']}`"
+        )
+    return "\n".join(lines), nav_buttons("myfiles", files, "uploaded_at", has_newer, has_older)
+
+async def batches_page(user_id: int, cursor=None, older: bool = True):
+    batches, more = await db.page_admin_batches(user_id, cursor, older, PAGE_SIZE)
+    if not batches:
+        return "📦 **Your Batches**\n\nNo batches found.", None
+    has_newer, has_older = (cursor is not None, more) if older else (more, True)
+    lines = ["📦 **Your Batches**\n"]
+    for batch in batches:
+        lines.append(
+            f"• `{batch['batch_id']}` — {batch['file_count']} files, {batch['created_at']} UTC\n"
+            f"  `https://t.me/{config.BOT_USERNAME}?start=batch_{batch['batch_id']}`"
+        )
+    return "\n".join(lines), nav_buttons("mybatches", batches, "created_at", has_newer, has_older)
+
+@Client.on_message(filters.command("myfiles"))
+async def my_files_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to use this command!")
+        return
+    text, markup = await files_page(message.from_user.id)
+    await message.reply_text(text, reply_markup=markup, disable_web_page_preview=True)
+
+@Client.on_message(filters.command("mybatches"))
+async def my_batches_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to use this command!")
+        return
+    text, markup = await batches_page(message.from_user.id)
+    await message.reply_text(text, reply_markup=markup, disable_web_page_preview=True)
+
+@router.prefix("myfiles", parse=parse_cursor)
+async def my_files_callback(client: Client, callback: CallbackQuery, page: Tuple[bool, Tuple[Any, ObjectId]]):
+    if not is_admin(callback):
+        return "⚠️ You are not authorized!"
+    older, cursor = page
+    text, markup = await files_page(callback.from_user.id, cursor, older)
+    await callback.message.edit_text(text, reply_markup=markup, disable_web_page_preview=True)
+
+@router.prefix("mybatches", parse=parse_cursor)
+async def my_batches_callback(client: Client, callback: CallbackQuery, page: Tuple[bool, Tuple[Any, ObjectId]]):
+    if not is_admin(callback):
+        return "⚠️ You are not authorized!"
+    older, cursor = page
+    text, markup = await batches_page(callback.from_user.id, cursor, older)
+    await callback.message.edit_text(text, reply_markup=markup, disable_web_page_preview=True)
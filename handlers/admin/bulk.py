@@ -0,0 +1,196 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from database import Database
+from utils import ThrottledStatus, is_admin, services, send_scheduler
+import config
+
+db = services.lazy(Database)
+
+FILTERS_HELP = (
+    "**Filters** (combine any):\n"
+    "• `uploader=<user_id>` - Uploaded by this user\n"
+    "• `older=<days>` - Uploaded more than this many days ago\n"
+    "• `type=<file_type>` - video, audio, document... (files only)"
+)
+
+EXPORT_FIELDS = {
+    "files": ["uuid", "file_name", "file_type", "file_size", "uploader_id", "downloads", "auto_delete_time", "uploaded_at"],
+    "batches": ["batch_id", "admin_id", "created_at", "file_count", "is_active", "auto_delete_time"],
+}
+
+def parse_filters(args: List[str]) -> Dict[str, Any]:
+    """Turn key=value arguments into Database bulk criteria, raises ValueError on bad input"""
+    criteria: Dict[str, Any] = {}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got `{arg}`")
+        key = key.lower()
+        if key == "uploader":
+            criteria["uploader_id"] = int(value)
+        elif key == "older":
+            criteria["older_than_days"] = float(value)
+        elif key == "type":
+            criteria["file_type"] = value.lower()
+        else:
+            raise ValueError(f"Unknown filter `{key}`")
+    return criteria
+
+def parse_kind(value: str) -> str:
+    kind = value.lower()
+    if kind not in EXPORT_FIELDS:
+        raise ValueError("Choose `files` or `batches`")
+    return kind
+
+@Client.on_message(filters.command("bulk_delete"))
+async def bulk_delete_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to use this command!")
+        return
+
+    args = message.command[1:]
+    confirmed = bool(args) and args[-1].lower() == "confirm"
+    if confirmed:
+        args = args[:-1]
+    if len(args) < 2:
+        await message.reply_text(
+            "**🗑 Bulk Delete Usage**\n\n"
+            "`/bulk_delete files|batches <filters> [confirm]`\n\n"
+            f"{FILTERS_HELP}\n\n"
+            "Without `confirm` only the number of matches is shown.\n"
+            "Example: `/bulk_delete files older=90 type=video confirm`"
+        )
+        return
+
+    try:
+        kind = parse_kind(args[0])
+        criteria = parse_filters(args[1:])
+        total = await db.count_matching(kind, **criteria)
+    except ValueError as e:
+        await message.reply_text(f"❌ {str(e)}")
+        return
+
+    if not confirmed:
+        await message.reply_text(
+            f"🔎 **{total} {kind} match**\n\n"
+            f"Repeat the command with `confirm` at the end to delete them."
+        )
+        return
+
+    status = ThrottledStatus(await message.reply_text(f"🗑 Deleting {total} {kind}..."))
+    deleted = 0
+    # Status edits share the send budget with deliveries, keep them behind
+    with send_scheduler.priority(send_scheduler.BULK):
+        async for count in db.bulk_delete(kind, config.BULK_CHUNK_SIZE, **criteria):
+            deleted += count
+            await status.update(f"🗑 Deleting {kind}...\n\n{deleted}/{total} done")
+        await status.update(f"✅ **Bulk Delete Complete**\n\n{deleted} {kind} deleted", force=True)
+
+@Client.on_message(filters.command("bulk_expire"))
+async def bulk_expire_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to use this command!")
+        return
+
+    args = message.command[1:]
+    if len(args) < 2:
+        await message.reply_text(
+            "**⏱ Bulk Auto-Delete Usage**\n\n"
+            "`/bulk_expire files|batches <minutes|default> [filters]`\n\n"
+            f"{FILTERS_HELP}\n\n"
+            "`default` makes them follow `/auto_del` again.\n"
+            "Example: `/bulk_expire files 60 uploader=12345`"
+        )
+        return
+
+    try:
+        kind = parse_kind(args[0])
+        delete_time = None if args[1].lower() == "default" else int(args[1])
+        if delete_time is not None and not 1 <= delete_time <= 10080:
+            raise ValueError("Time must be between 1 and 10080 minutes (7 days)")
+        criteria = parse_filters(args[2:])
+        total = await db.count_matching(kind, **criteria)
+    except ValueError as e:
+        await message.reply_text(f"❌ {str(e)}")
+        return
+
+    status = ThrottledStatus(await message.reply_text(f"⏱ Updating {total} {kind}..."))
+    updated = 0
+    with send_scheduler.priority(send_scheduler.BULK):
+        async for count in db.bulk_set_autodelete(kind, delete_time, config.BULK_CHUNK_SIZE, **criteria):
+            updated += count
+            await status.update(f"⏱ Updating {kind}...\n\n{updated}/{total} done")
+        new_time = "the default policy" if delete_time is None else f"{delete_time} minutes"
+        await status.update(
+            f"✅ **Auto-Delete Updated**\n\n{updated} {kind} now use {new_time}.\n"
+            f"Files already delivered keep their old deletion time.",
+            force=True
+        )
+
+def write_row(handle, writer, doc: Dict[str, Any], fields: List[str]) -> None:
+    row = {field: doc.get(field) for field in fields}
+    for field, value in row.items():
+        if isinstance(value, datetime):
+            row[field] = value.isoformat()
+    if writer is None:
+        handle.write(json.dumps(row) + "\n")
+    else:
+        writer.writerow(row)
+
+@Client.on_message(filters.command("export"))
+async def export_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to use this command!")
+        return
+
+    args = message.command[1:]
+    if len(args) < 2 or args[0].lower() not in ("csv", "jsonl"):
+        await message.reply_text(
+            "**📤 Export Usage**\n\n"
+            "`/export csv|jsonl files|batches [filters]`\n\n"
+            f"{FILTERS_HELP}\n\n"
+            "Example: `/export csv files uploader=12345`"
+        )
+        return
+
+    fmt = args[0].lower()
+    try:
+        kind = parse_kind(args[1])
+        criteria = parse_filters(args[2:])
+        total = await db.count_matching(kind, **criteria)
+    except ValueError as e:
+        await message.reply_text(f"❌ {str(e)}")
+        return
+
+    fields = EXPORT_FIELDS[kind]
+    status = ThrottledStatus(await message.reply_text(f"📤 Exporting {total} {kind}..."))
+    # Rows go straight to disk, a large library never sits in memory
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    written = 0
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as handle:
+            writer = None
+            if fmt == "csv":
+                writer = csv.DictWriter(handle, fieldnames=fields)
+                writer.writeheader()
+            with send_scheduler.priority(send_scheduler.BULK):
+                async for doc in db.iter_export(kind, config.BULK_CHUNK_SIZE, **criteria):
+                    write_row(handle, writer, doc, fields)
+                    written += 1
+                    if written % config.BULK_CHUNK_SIZE == 0:
+                        await status.update(f"📤 Exporting {kind}...\n\n{written}/{total} rows")
+
+        await message.reply_document(
+            path,
+            file_name=f"{kind}_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}",
+            caption=f"📤 {written} {kind}"
+        )
+        await status.update(f"✅ **Export Complete**\n\n{written} {kind} exported", force=True)
+    finally:
+        os.remove(path)
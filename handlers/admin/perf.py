@@ -0,0 +1,33 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from utils import is_admin, tracing
+
+def format_summary(title: str, summary: dict, limit: int = 15) -> str:
+    lines = [f"**{title}**", "```", f"{'name':<28}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for name, stats in list(summary.items())[:limit]:
+        lines.append(
+            f"{name[:27]:<28}{stats['count']:>6}"
+            f"{stats['p50']:>8.0f}{stats['p95']:>8.0f}{stats['p99']:>8.0f}"
+        )
+    lines.append("```")
+    return "\n".join(lines)
+
+@Client.on_message(filters.command("perf"))
+async def perf_command(client: Client, message: Message):
+    if not is_admin(message):
+        await message.reply_text("⚠️ You are not authorized to view performance stats!")
+        return
+
+    handlers = tracing.HANDLERS.snapshot()
+    if not handlers:
+        await message.reply_text("📉 No handler calls recorded yet.")
+        return
+
+    perf_text = (
+        "⏱ **Performance (last "
+        f"{tracing.WINDOW} calls per name, ms)**\n\n"
+        + format_summary("Handlers", handlers)
+        + "\n\n"
+        + format_summary("Spans", tracing.SPANS.snapshot())
+    )
+    await message.reply_text(perf_text)
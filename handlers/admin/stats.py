@@ -1,10 +1,10 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from database import Database
-from utils import is_admin, humanbytes
-import config
+from utils import is_admin, humanbytes, services
+from ..utils.delivery import policies
 
-db = Database()
+db = services.lazy(Database)
 
 @Client.on_message(filters.command("stats"))
 async def stats_command(client: Client, message: Message):
@@ -13,6 +13,7 @@ async def stats_command(client: Client, message: Message):
         return
     
     stats = await db.get_stats()
+    default_minutes = await policies.minutes()
     stats_text = (
         "📊 **Bot Statistics**\n\n"
         f"📁 Files: {stats['total_files']}\n"
@@ -20,6 +21,6 @@ async def stats_command(client: Client, message: Message):
         f"📥 Downloads: {stats['total_downloads']}\n"
         f"💾 Size: {humanbytes(stats['total_size'])}\n"
         f"🕒 Auto-Delete Files: {stats.get('active_autodelete_files', 0)}\n\n"
-        f"⏱ Current Auto-Delete Time: {getattr(config, 'DEFAULT_AUTO_DELETE', 30)} minutes"
+        f"⏱ Current Auto-Delete Time: {default_minutes} minutes"
     )
     await message.reply_text(stats_text)
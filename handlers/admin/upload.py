@@ -1,12 +1,13 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from database import Database
-from utils import ButtonManager, is_admin, humanbytes
+from utils import ButtonManager, StorageManager, is_admin, humanbytes, short_id, services
+from ..utils.delivery import policies
 import config
-import uuid
 
-db = Database()
-button_manager = ButtonManager()
+db = services.lazy(Database)
+button_manager = services.lazy(ButtonManager)
+storage = StorageManager()
 
 @Client.on_message(filters.command("upload") & filters.reply)
 async def upload_command(client: Client, message: Message):
@@ -22,18 +23,17 @@ async def upload_command(client: Client, message: Message):
     status_msg = await message.reply_text("🔄 **Processing Upload**\n\n⏳ Please wait...")
     
     try:
-        forwarded_msg = await replied_msg.forward(config.DB_CHANNEL_ID)
-        
         file_data = {
             "file_id": None,
             "file_name": "Unknown",
             "file_size": 0,
             "file_type": None,
-            "uuid": str(uuid.uuid4()),
+            "uuid": short_id.generate(),
             "uploader_id": message.from_user.id,
-            "message_id": forwarded_msg.id,
+            "message_id": None,
             "auto_delete": True,
-            "auto_delete_time": getattr(config, 'DEFAULT_AUTO_DELETE', 30)
+            # Follows the uploader/global policy until overridden with /auto_del file
+            "auto_delete_time": None
         }
 
         if replied_msg.document:
@@ -97,17 +97,37 @@ async def upload_command(client: Client, message: Message):
             await status_msg.edit_text(f"❌ **File too large!**\nMaximum size: {humanbytes(config.MAX_FILE_SIZE)}")
             return
 
+        file_data["file_unique_id"] = getattr(replied_msg, file_data["file_type"]).file_unique_id
+        existing = await db.get_file_by_unique_id(file_data["file_unique_id"])
+        if existing:
+            share_link = f"https://t.me/{config.BOT_USERNAME}?start={existing['uuid']}"
+            await status_msg.edit_text(
+                f"♻️ **File Already Uploaded**\n\n"
+                f"📁 **File Name:** `{existing['file_name']}`\n"
+                f"📥 **Downloads:** {existing.get('downloads', 0)}\n"
+                f"🔗 **Share Link:** `{share_link}`",
+                reply_markup=button_manager.file_button(existing["uuid"])
+            )
+            return
+
+        file_data.update(await storage.store(replied_msg, file_data["uuid"]))
+
         file_uuid = await db.add_file(file_data)
+        if file_uuid != file_data["uuid"]:
+            # Lost a race against an identical upload, drop our extra copies
+            for location in storage.locations(file_data):
+                await client.delete_messages(location["chat_id"], location["message_id"])
         share_link = f"https://t.me/{config.BOT_USERNAME}?start={file_uuid}"
+        delete_minutes = await policies.for_file(file_data)
         
         upload_success_text = (
             f"✅ **File Upload Successful**\n\n"
             f"📁 **File Name:** `{file_data['file_name']}`\n"
             f"📊 **Size:** {humanbytes(file_data['file_size'])}\n"
             f"📎 **Type:** {file_data['file_type']}\n"
-            f"⏱ **Auto-Delete:** {file_data['auto_delete_time']} minutes\n"
+            f"⏱ **Auto-Delete:** {delete_minutes} minutes\n"
             f"🔗 **Share Link:** `{share_link}`\n\n"
-            f"💡 Use `/auto_del <minutes>` to change auto-delete time"
+            f"💡 Use `/auto_del file {file_uuid} <minutes>` to change auto-delete time"
         )
         
         await status_msg.edit_text(
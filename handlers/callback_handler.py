@@ -1,56 +1,63 @@
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery
 from database import Database
-from utils import ButtonManager, is_admin
+from utils import ButtonManager, StorageManager, CallbackRouter, is_admin, metrics, services
+from .utils.delivery import deliveries
 import config
 
-db = Database()
-button_manager = ButtonManager()
+db = services.lazy(Database)
+button_manager = services.lazy(ButtonManager)
+storage = StorageManager()
+router = CallbackRouter()
 
-@Client.on_callback_query()
-async def callback_handler(client: Client, callback: CallbackQuery):
-    if callback.data == "home":
-        await button_manager.show_start(client, callback)
-    
-    elif callback.data == "help":
-        await button_manager.show_help(client, callback)
-    
-    elif callback.data == "about":
-        await button_manager.show_about(client, callback)
-    
-    elif callback.data.startswith("download_"):
-        # Check force subscription
-        if not await button_manager.check_force_sub(client, callback.from_user.id):
-            await callback.answer(
-                "Please join our channel to download files!",
-                show_alert=True
-            )
-            return
-            
-        file_uuid = callback.data.split("_")[1]
+@router.exact("home")
+async def home_callback(client: Client, callback: CallbackQuery, payload: None):
+    await button_manager.show_start(client, callback)
+
+@router.exact("help")
+async def help_callback(client: Client, callback: CallbackQuery, payload: None):
+    await button_manager.show_help(client, callback)
+
+@router.exact("about")
+async def about_callback(client: Client, callback: CallbackQuery, payload: None):
+    await button_manager.show_about(client, callback)
+
+@router.prefix("download")
+async def download_callback(client: Client, callback: CallbackQuery, file_uuid: str):
+    # Check force subscription
+    if not await button_manager.check_force_sub(client, callback.from_user.id):
+        return "Please join our channel to download files!"
+
+    async def send_file():
         file_data = await db.get_file(file_uuid)
-        
         if not file_data:
-            await callback.answer("File not found!", show_alert=True)
-            return
-            
-        try:
-            await client.copy_message(
-                chat_id=callback.message.chat.id,
-                from_chat_id=config.DB_CHANNEL_ID,
-                message_id=file_data["msg_id"]
-            )
-            await db.increment_downloads(file_uuid)
-        except Exception as e:
-            await callback.answer(f"Error: {str(e)}", show_alert=True)
-    
-    elif callback.data.startswith("share_"):
-        file_uuid = callback.data.split("_")[1]
-        share_link = f"https://t.me/{config.BOT_USERNAME}?start={file_uuid}"
-        await callback.answer(
-            f"Share Link: {share_link}",
-            show_alert=True
-        )
-    
-    await callback.answer()
-    
+            return None
+        msg = await storage.deliver(client, file_data, callback.message.chat.id)
+        await db.increment_downloads(file_uuid)
+        return msg
+
+    # Double taps wait for the first delivery instead of copying the file again
+    msg, fresh = await deliveries.run((callback.message.chat.id, file_uuid), send_file)
+    if msg is None:
+        return "File not found!"
+    metrics.DELIVERIES.inc("sent" if fresh else "coalesced")
+
+@router.prefix("share")
+async def share_callback(client: Client, callback: CallbackQuery, file_uuid: str):
+    share_link = f"https://t.me/{config.BOT_USERNAME}?start={file_uuid}"
+    return f"Share Link: {share_link}"
+
+@router.prefix("delete_batch")
+async def delete_batch_callback(client: Client, callback: CallbackQuery, batch_id: str):
+    # Button added to the summary sent by /done_batch
+    if not is_admin(callback):
+        return "⚠️ You are not authorized!"
+    result = await db.delete_batch(batch_id)
+    if not result.deleted_count:
+        return "Batch not found!"
+    await callback.message.edit_reply_markup(None)
+    return "🗑 Batch deleted!"
+
+@Client.on_callback_query()
+async def callback_handler(client: Client, callback: CallbackQuery):
+    await router.dispatch(client, callback)
@@ -0,0 +1,64 @@
+from pyrogram import Client
+from pyrogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton
+)
+from database import Database
+from utils import is_admin, humanbytes, metrics, services
+from utils.coalesce import Coalescer
+import config
+
+db = services.lazy(Database)
+
+# Identical searches within the window share one query, and people typing
+# tend to send the same prefix several times
+searches = Coalescer(config.INLINE_CACHE_SECONDS)
+
+PAGE_SIZE = 20
+
+
+def can_search(inline_query: InlineQuery) -> bool:
+    if config.INLINE_SEARCH == "all":
+        return True
+    return config.INLINE_SEARCH == "admins" and is_admin(inline_query)
+
+
+def file_result(file_data: dict) -> InlineQueryResultArticle:
+    share_link = f"https://t.me/{config.BOT_USERNAME}?start={file_data['uuid']}"
+    return InlineQueryResultArticle(
+        title=file_data["file_name"],
+        description=(
+            f"{file_data.get('file_type') or 'file'} • {humanbytes(file_data.get('file_size') or 0)}"
+            f" • {file_data.get('downloads', 0)} downloads"
+        ),
+        input_message_content=InputTextMessageContent(
+            f"📁 **{file_data['file_name']}**\n\n🔗 **Download Link:** `{share_link}`"
+        ),
+        # A deep link rather than callback buttons, those don't know the chat of an inline message
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("📥 Get File", url=share_link)]]),
+        id=file_data["uuid"]
+    )
+
+
+@Client.on_inline_query()
+async def inline_search(client: Client, inline_query: InlineQuery):
+    query = inline_query.query.strip().lower()
+    if not query or not can_search(inline_query):
+        await inline_query.answer([], cache_time=config.INLINE_CACHE_SECONDS, is_personal=True)
+        return
+
+    offset = inline_query.offset
+    (files, next_offset), fresh = await searches.run(
+        (query, offset), lambda: db.search_files(query, offset, PAGE_SIZE)
+    )
+    metrics.INLINE_QUERIES.inc("miss" if fresh else "hit")
+    await inline_query.answer(
+        [file_result(file_data) for file_data in files],
+        cache_time=config.INLINE_CACHE_SECONDS,
+        # Only admins may get results in admins mode, so Telegram mustn't share them
+        is_personal=config.INLINE_SEARCH != "all",
+        next_offset=next_offset
+    )
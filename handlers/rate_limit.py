@@ -0,0 +1,47 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery, InlineQuery
+from typing import Union
+from utils import RateLimiter
+from .worker_shard import foreign_update
+import config
+
+# Runs before the command handlers, so throttled requests never reach
+# force-sub checks, the database or copy_message.
+
+limiter = RateLimiter(
+    config.RATE_LIMIT_BURST,
+    config.RATE_LIMIT_PER_MINUTE,
+    config.RATE_LIMIT_GLOBAL_PER_SECOND
+)
+
+
+def over_limit(_, __, update: Union[Message, CallbackQuery, InlineQuery]) -> bool:
+    user = update.from_user
+    if user is None or user.id in config.ADMIN_IDS:
+        return False
+    return limiter.check(user.id) != "ok"
+
+# Foreign updates are left alone, their own worker counts them
+throttled = ~foreign_update & filters.create(over_limit)
+
+
+@Client.on_message(filters.command("start") & throttled, group=-2)
+async def throttle_start(client: Client, message: Message):
+    # One notice per throttled streak, replying every time would spend the send budget we're protecting
+    if limiter.should_warn(message.from_user.id):
+        await message.reply_text(config.Messages.RATE_LIMIT_TEXT)
+    message.stop_propagation()
+
+
+@Client.on_callback_query(throttled, group=-2)
+async def throttle_callback(client: Client, callback: CallbackQuery):
+    # Answering is free and stops the button spinner
+    await callback.answer(config.Messages.RATE_LIMIT_TEXT, show_alert=limiter.should_warn(callback.from_user.id))
+    callback.stop_propagation()
+
+
+@Client.on_inline_query(throttled, group=-2)
+async def throttle_inline(client: Client, inline_query: InlineQuery):
+    # An empty answer, Telegram shows nothing rather than a stale spinner
+    await inline_query.answer([], cache_time=0, is_personal=True)
+    inline_query.stop_propagation()
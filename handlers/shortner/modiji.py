@@ -1,6 +1,6 @@
 from pyrogram import Client, filters
-import requests
-import time
+from aiohttp import ClientError
+from utils.http import get_session
 from rich.console import Console
 from rich.panel import Panel
 import config  # Added import for config
@@ -46,15 +46,10 @@ async def short_url_command(client, message):
             'url': url,
             'format': 'json'
         }
-        
-        
-        time.sleep(2)
-        
-        
-        response = requests.get(MODIJI_API_URL, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+
+        async with get_session().get(MODIJI_API_URL, params=params) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
         
         if data.get('status') == 'success':
             shortened_url = data.get('shortenedUrl')
@@ -77,7 +72,7 @@ async def short_url_command(client, message):
             "**Usage:** `/short url`",
             quote=True
         )
-    except requests.RequestException as e:
+    except ClientError as e:
         await status_msg.edit_text(
             f"❌ **API Error:**\n`{str(e)}`\n\n"
             "Please try again later."
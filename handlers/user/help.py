@@ -1,8 +1,8 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from utils import ButtonManager
+from utils import ButtonManager, services
 
-button_manager = ButtonManager()
+button_manager = services.lazy(ButtonManager)
 
 @Client.on_message(filters.command("help"))
 async def help_command(client: Client, message: Message):
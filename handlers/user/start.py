@@ -1,17 +1,70 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from database import Database
-from utils import ButtonManager
+from utils import ButtonManager, StorageManager, UserActivityTracker, lifecycle, metrics, services
+from utils.stream_links import download_link
 import config
-import asyncio
+from datetime import datetime, timedelta
 from ..utils.message_delete import schedule_message_deletion
+from ..utils.delivery import deliveries, policies
 
-db = Database()
-button_manager = ButtonManager()
+db = services.lazy(Database)
+button_manager = services.lazy(ButtonManager)
+storage = StorageManager()
+activity = UserActivityTracker(db)
+
+async def deliver_batch(client: Client, message: Message, batch_uuid: str):
+    """Send every file of a batch, shared by batch_ /start links and /batch_start"""
+    chat_id = message.chat.id
+
+    async def send_batch():
+        batch_data = await db.get_batch(batch_uuid)
+        if not batch_data:
+            return None
+
+        sent = []
+        for file_data in batch_data["files"]:
+            try:
+                msg = await storage.deliver(client, file_data, chat_id, protect_content=config.PRIVACY_MODE)
+                sent.append(msg.id)
+            except Exception as e:
+                await message.reply_text(f"❌ Error: {str(e)}", protect_content=config.PRIVACY_MODE)
+        if not sent:
+            return sent
+        await db.increment_batch_downloads(batch_uuid)
+
+        delete_time = await policies.for_batch(batch_data)
+        if delete_time:
+            info_msg = await message.reply_text(
+                f"⏳ **File Auto-Delete Information**\n\n"
+                f"These files will be automatically deleted in {delete_time} minutes\n"
+                f"💡 **Save them to your saved messages before they're deleted!**",
+                protect_content=config.PRIVACY_MODE
+            )
+            sent.append(info_msg.id)
+            # Batch files have no document of their own, the sweep reads these if the timer is lost
+            delete_at = datetime.utcnow() + timedelta(minutes=delete_time)
+            await db.add_pending_deletions([
+                {"chat_id": chat_id, "message_id": msg_id, "delete_at": delete_at} for msg_id in sent
+            ])
+            lifecycle.spawn(schedule_message_deletion(client, None, chat_id, sent, delete_time))
+        return sent
+
+    try:
+        sent, fresh = await deliveries.run((chat_id, f"batch_{batch_uuid}"), send_batch)
+    except Exception as e:
+        await message.reply_text(f"❌ Error: {str(e)}", protect_content=config.PRIVACY_MODE)
+        return
+    if sent is None:
+        if fresh:
+            await message.reply_text("❌ Batch not found or has been deleted!", protect_content=config.PRIVACY_MODE)
+        return
+    if sent:
+        metrics.DELIVERIES.inc("sent" if fresh else "coalesced")
 
 @Client.on_message(filters.command("start"))
 async def start_command(client: Client, message: Message):
-    await db.add_user(message.from_user.id, message.from_user.username)
+    activity.touch(message.from_user.id, message.from_user.username)
     
     if len(message.command) > 1:
         file_uuid = message.command[1]
@@ -24,39 +77,60 @@ async def start_command(client: Client, message: Message):
                 disable_web_page_preview=True
             )
             return
-        
-        file_data = await db.get_file(file_uuid)
-        if not file_data:
-            await message.reply_text("❌ File not found or has been deleted!", protect_content=config.PRIVACY_MODE)
+
+        # /done_batch links are ?start=batch_<id>
+        if file_uuid.startswith("batch_"):
+            await deliver_batch(client, message, file_uuid[len("batch_"):])
             return
         
-        try:
-            msg = await client.copy_message(
-                chat_id=message.chat.id,
-                from_chat_id=config.DB_CHANNEL_ID,
-                message_id=file_data["message_id"],
-                protect_content=config.PRIVACY_MODE
+        async def send_file():
+            file_data = await db.get_file(file_uuid)
+            if not file_data:
+                return None
+
+            # Served from the policy cache, no extra query per delivery
+            delete_time = await policies.for_file(file_data)
+            # A direct link would outlive the auto-delete, so it expires with it
+            link = download_link(file_data["uuid"], delete_time * 60 if delete_time else None)
+            msg = await storage.deliver(
+                client,
+                file_data,
+                message.chat.id,
+                protect_content=config.PRIVACY_MODE,
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬇️ Direct Download", url=link)]]) if link else None
             )
+            # The due time is stored with the delivery so the sweep can range-scan it
+            delete_at = datetime.utcnow() + timedelta(minutes=delete_time) if delete_time else None
             await db.increment_downloads(file_uuid)
-            await db.update_file_message_id(file_uuid, msg.id, message.chat.id)
-            
-            if file_data.get("auto_delete"):
-                delete_time = file_data.get("auto_delete_time")
-                if delete_time:
-                    info_msg = await msg.reply_text(
-                        f"⏳ **File Auto-Delete Information**\n\n"
-                        f"This file will be automatically deleted in {delete_time} minutes\n"
-                        f"• Delete Time: {delete_time} minutes\n"
-                        f"• Time Left: {delete_time} minutes\n"
-                        f"💡 **Save this file to your saved messages before it's deleted!**",
-                        protect_content=config.PRIVACY_MODE
-                    )
-                    
-                    asyncio.create_task(schedule_message_deletion(
-                        client, file_uuid, message.chat.id, [msg.id, info_msg.id], delete_time
-                    ))
+            await db.update_file_message_id(file_uuid, msg.id, message.chat.id, delete_at)
+
+            if delete_time:
+                info_msg = await msg.reply_text(
+                    f"⏳ **File Auto-Delete Information**\n\n"
+                    f"This file will be automatically deleted in {delete_time} minutes\n"
+                    f"• Delete Time: {delete_time} minutes\n"
+                    f"• Time Left: {delete_time} minutes\n"
+                    f"💡 **Save this file to your saved messages before it's deleted!**",
+                    protect_content=config.PRIVACY_MODE
+                )
+                await db.update_file_message_id(file_uuid, info_msg.id, message.chat.id, delete_at)
+
+                lifecycle.spawn(schedule_message_deletion(
+                    client, file_uuid, message.chat.id, [msg.id, info_msg.id], delete_time
+                ))
+            return msg
+
+        try:
+            # A repeat of a delivery still in progress (or just finished) sends nothing new
+            msg, fresh = await deliveries.run((message.chat.id, file_uuid), send_file)
         except Exception as e:
             await message.reply_text(f"❌ Error: {str(e)}", protect_content=config.PRIVACY_MODE)
+            return
+        if msg is None:
+            if fresh:
+                await message.reply_text("❌ File not found or has been deleted!", protect_content=config.PRIVACY_MODE)
+            return
+        metrics.DELIVERIES.inc("sent" if fresh else "coalesced")
         return
     
     # Check force subscription for start command
@@ -70,10 +144,7 @@ async def start_command(client: Client, message: Message):
         return
 
     await message.reply_text(
-        config.Messages.START_TEXT.format(
-            bot_name=config.BOT_NAME,
-            user_mention=message.from_user.mention
-        ),
+        button_manager.start_text(message.from_user.mention),
         reply_markup=button_manager.start_button(),
         protect_content=config.PRIVACY_MODE
     )
@@ -142,11 +213,9 @@ async def batch_upload_command(client: Client, message: Message):
 
 @Client.on_message(filters.command("batch_start") & filters.private)
 async def batch_start_command(client: Client, message: Message):
-    await db.add_user(message.from_user.id, message.from_user.username)
+    activity.touch(message.from_user.id, message.from_user.username)
 
     if len(message.command) > 1 and message.command[1].startswith("batch_"):
-        batch_uuid = message.command[1].split("_")[1]
-
         is_subscribed = await button_manager.check_force_sub(client, message.from_user.id)
         if not is_subscribed:
             await message.reply_text(
@@ -156,30 +225,11 @@ async def batch_start_command(client: Client, message: Message):
             )
             return
 
-        batch_data = await db.get_batch(batch_uuid)
-        if not batch_data:
-            await message.reply_text("❌ Batch not found or has been deleted!", protect_content=config.PRIVACY_MODE)
-            return
-
-        for file_data in batch_data["files"]:
-            try:
-                msg = await client.copy_message(
-                    chat_id=message.chat.id,
-                    from_chat_id=config.DB_CHANNEL_ID,
-                    message_id=file_data["message_id"],
-                    protect_content=config.PRIVACY_MODE
-                )
-                await db.increment_downloads(file_data["file_uuid"])
-                await db.update_file_message_id(file_data["file_uuid"], msg.id, message.chat.id)
-            except Exception as e:
-                await message.reply_text(f"❌ Error: {str(e)}", protect_content=config.PRIVACY_MODE)
+        await deliver_batch(client, message, message.command[1][len("batch_"):])
         return
 
     await message.reply_text(
-        config.Messages.START_TEXT.format(
-            bot_name=config.BOT_NAME,
-            user_mention=message.from_user.mention
-        ),
+        button_manager.start_text(message.from_user.mention),
         reply_markup=button_manager.start_button(),
         protect_content=config.PRIVACY_MODE
         )
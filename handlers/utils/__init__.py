@@ -1,4 +1,5 @@
-from .message_delete import schedule_message_deletion
+from .message_delete import schedule_message_deletion, sweep_overdue_deliveries
+from .delivery import deliveries, policies
 from .utils import (
     get_size_formatted,
     time_formatter,
@@ -7,6 +8,9 @@ from .utils import (
 
 __all__ = [
     'schedule_message_deletion',
+    'sweep_overdue_deliveries',
+    'deliveries',
+    'policies',
     'get_size_formatted',
     'time_formatter',
     'ButtonManager'
@@ -0,0 +1,11 @@
+from database import Database
+from utils import AutoDeletePolicies, services
+from utils.coalesce import Coalescer
+import config
+
+# Deliveries in flight per (chat_id, uuid), shared by /start links and Download buttons
+# so double taps and re-sent links copy the file once
+deliveries = Coalescer(config.DELIVERY_DEDUP_WINDOW)
+
+# Auto-delete minutes per delivery, /auto_del invalidates this same cache
+policies = AutoDeletePolicies(services.lazy(Database))
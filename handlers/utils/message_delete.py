@@ -1,24 +1,70 @@
 from pyrogram import Client
+from pyrogram.errors import FloodWait
 from database import Database
+from utils import metrics, services, send_scheduler
 import asyncio
+from collections import defaultdict
 
-db = Database()
+db = services.lazy(Database)
+
+def _by_chat(due: list) -> dict:
+    by_chat = defaultdict(list)
+    for entry in due:
+        by_chat[entry["chat_id"]].append(entry["message_id"])
+    return by_chat
+
+async def _delete_due(client: Client, chat_id: int, message_ids: list):
+    # Telegram takes up to 100 ids per call
+    for i in range(0, len(message_ids), 100):
+        chunk = message_ids[i:i + 100]
+        try:
+            await client.delete_messages(chat_id, chunk)
+            metrics.DELETIONS.inc("swept", amount=len(chunk))
+        except Exception as e:
+            metrics.DELETIONS.inc("error", amount=len(chunk))
+            print(f"Error in auto-delete sweep: {str(e)}")
+
+async def sweep_overdue_deliveries(client: Client, grace: int = 300):
+    """Delete delivered files whose in-process timer was lost, e.g. to a restart"""
+    async for due, removals in db.iter_due_deliveries(grace):
+        for chat_id, message_ids in _by_chat(due).items():
+            await _delete_due(client, chat_id, message_ids)
+        # Dropped either way, a message we can't delete now won't become deletable later
+        await db.remove_due_deliveries(removals)
+    # Batch deliveries and those of files removed by /bulk_delete
+    async for due in db.iter_due_pending_deletions(grace):
+        for chat_id, message_ids in _by_chat(due).items():
+            await _delete_due(client, chat_id, message_ids)
+            await db.remove_pending_deletions(chat_id, message_ids)
 
 async def schedule_message_deletion(client: Client, file_uuid: str, chat_id: int, message_ids: list, delete_time: int):
-    await asyncio.sleep(delete_time * 60)
+    metrics.PENDING_DELETIONS.inc()
+    try:
+        await asyncio.sleep(delete_time * 60)
+    finally:
+        metrics.PENDING_DELETIONS.dec()
     try:
         await client.delete_messages(chat_id, message_ids)
-        await client.send_message(
-            chat_id=chat_id,
-            text=(
-                "🚫 **File Deleted Due to Copyright Protection**\n\n"
-                "The file you received has been automatically deleted as part of our copyright protection measures.\n\n"
-                "• If you need the file again, you can request it using the same link\n"
-                "• Save important files to your saved messages before they're deleted\n"
-                "• This helps us maintain a fair and legal file-sharing environment"
+        with send_scheduler.priority(send_scheduler.NOTICE):
+            await client.send_message(
+                chat_id=chat_id,
+                text=(
+                    "🚫 **File Deleted Due to Copyright Protection**\n\n"
+                    "The file you received has been automatically deleted as part of our copyright protection measures.\n\n"
+                    "• If you need the file again, you can request it using the same link\n"
+                    "• Save important files to your saved messages before they're deleted\n"
+                    "• This helps us maintain a fair and legal file-sharing environment"
+                )
             )
-        )
-        for msg_id in message_ids:
-            await db.remove_file_message(file_uuid, chat_id, msg_id)
+        if file_uuid:
+            for msg_id in message_ids:
+                await db.remove_file_message(file_uuid, chat_id, msg_id)
+        else:
+            # Batch deliveries are queued in pending_deletions instead
+            await db.remove_pending_deletions(chat_id, message_ids)
+        metrics.DELETIONS.inc("ok")
     except Exception as e:
+        metrics.DELETIONS.inc("error")
+        if isinstance(e, FloodWait):
+            metrics.FLOOD_WAITS.inc("auto_delete")
         print(f"Error in auto-delete: {str(e)}")
@@ -0,0 +1,29 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery, InlineQuery
+from typing import Union
+import config
+
+# With several workers on one bot token every worker sees every update.
+# This runs before all other handlers and drops updates owned by another worker.
+
+def owns_update(_, __, update: Union[Message, CallbackQuery, InlineQuery]) -> bool:
+    user = update.from_user
+    if user is None:
+        # Channel posts and anonymous admins go to the first worker
+        return config.WORKER_INDEX == 0
+    return user.id % config.WORKER_COUNT == config.WORKER_INDEX
+
+foreign_update = ~filters.create(owns_update)
+
+if config.WORKER_COUNT > 1:
+    @Client.on_message(foreign_update, group=-1)
+    async def skip_foreign_message(client: Client, message: Message):
+        message.stop_propagation()
+
+    @Client.on_callback_query(foreign_update, group=-1)
+    async def skip_foreign_callback(client: Client, callback: CallbackQuery):
+        callback.stop_propagation()
+
+    @Client.on_inline_query(foreign_update, group=-1)
+    async def skip_foreign_inline(client: Client, inline_query: InlineQuery):
+        inline_query.stop_propagation()
@@ -1,7 +1,15 @@
 #AlphaShare bot join @Thealphabotz
+from utils import startup
+startup.install()
+
 from pyrogram import Client, idle
+from pyrogram.handlers import RawUpdateHandler
 from web import start_webserver, ping_server
 from database import Database
+from utils import metrics, lifecycle, services, send_scheduler, SendScheduler, UserActivityTracker
+from utils.http import close_session
+from utils.jobs import LeaderLease, JobRunner, WorkerPresence
+from handlers.utils import sweep_overdue_deliveries
 import config
 import asyncio
 import os
@@ -15,25 +23,93 @@ class FileShareBot(Client):
             api_id=config.API_ID,
             api_hash=config.API_HASH,
             bot_token=config.BOT_TOKEN,
-            plugins=dict(root="handlers")
+            plugins=dict(root="handlers"),
+            # Updates that arrive while draining are never queued, fetch them again on the next start
+            skip_updates=False
+        )
+        self.db = services.get(Database)
+        self.scheduler = services.get(SendScheduler)
+        lease = LeaderLease(self.db.leases)
+        self.jobs = JobRunner(lease, WorkerPresence(self.db.leases, lease.holder, on_change=self.scheduler.set_workers))
+        self.jobs.register(
+            "auto_delete_sweep",
+            config.AUTO_DELETE_SWEEP_INTERVAL,
+            lambda: sweep_overdue_deliveries(self)
         )
-        self.db = Database()
+        self.web_runner = None
+        self.ping_task = None
         print("Bot Initialized!")
 
     async def start(self):
         await super().start()
+        metrics.instrument_handlers(self)
+        await self.db.create_indexes()
         me = await self.get_me()
         print(f"Bot Started as {me.first_name}")
         print(f"Username: @{me.username}")
+        print(f"Worker {config.WORKER_INDEX + 1}/{config.WORKER_COUNT}")
         print("----------------")
+        self.jobs.start()
+        startup.mark("started")
+        if startup.enabled:
+            # Last group, so it runs after the real handlers are done with the update
+            self._first_update_handler = RawUpdateHandler(self._on_first_update)
+            self.add_handler(self._first_update_handler, group=1000)
+
+    async def handle_updates(self, updates):
+        # Returning before the pts is stored leaves these updates to the next start's recover_gaps
+        if lifecycle.draining:
+            return
+        await super().handle_updates(updates)
+
+    async def invoke(self, query, *args, **kwargs):
+        # Every message the bot sends, whichever handler it comes from, is paced by the scheduler
+        chat_id = send_scheduler.send_target(query)
+        if chat_id is None:
+            return await super().invoke(query, *args, **kwargs)
+        return await self.scheduler.submit(chat_id, super().invoke, query, *args, **kwargs)
+
+    async def _on_first_update(self, client, update, users, chats):
+        self.remove_handler(self._first_update_handler, group=1000)
+        startup.mark("first update processed")
+        startup.report()
 
        
 
     async def stop(self):
+        # Stop taking new updates, then let the queued ones and running handlers finish
+        lifecycle.start_draining()
+        if not await lifecycle.wait_idle(config.SHUTDOWN_TIMEOUT, self.dispatcher.updates_queue):
+            print(
+                f"Shutdown timeout, {lifecycle.in_flight()} handlers still running, "
+                f"{self.dispatcher.updates_queue.qsize()} updates queued"
+            )
+
+        await self.scheduler.close()
+
+        written = await UserActivityTracker.flush_all()
+        if written:
+            print(f"Flushed {written} pending user writes")
+
+        # Deletion timers are already persisted in active_messages,
+        # the leader sweep picks them up after restart
+        cancelled = await lifecycle.cancel_background()
+        if cancelled:
+            print(f"Handed {cancelled} pending deletions over to the sweep")
+        await self.jobs.stop()
+
+        if self.ping_task:
+            self.ping_task.cancel()
+        if self.web_runner:
+            await self.web_runner.cleanup()
+        await close_session()
+
         await super().stop()
+        Database.close_all()
         print("Bot Stopped. Bye!")
 
 async def main():
+    startup.mark("imports done")
     bot = FileShareBot()
     
     try:
@@ -41,8 +117,8 @@ async def main():
         await bot.start()
         print("Bot is Running!")
         if config.WEB_SERVER:
-            asyncio.create_task(start_webserver())
-            asyncio.create_task(ping_server(config.PING_URL, config.PING_TIME))
+            bot.web_runner = await start_webserver(bot)
+            bot.ping_task = asyncio.create_task(ping_server(config.PING_URL, config.PING_TIME))
             
         await idle()
     except Exception as e:
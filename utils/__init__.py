@@ -1,11 +1,54 @@
-from .button_manager import ButtonManager
-from .progress import progress_callback, humanbytes, TimeFormatter
-from .admin_check import is_admin
+import importlib
+
+# Names are resolved on first access, so importing one helper module
+# (e.g. utils.startup) doesn't drag in pyrogram and everything else
+_exports = {
+    'ButtonManager': '.button_manager',
+    'StorageManager': '.storage',
+    'CallbackRouter': '.callback_router',
+    'UserActivityTracker': '.user_activity',
+    'RateLimiter': '.rate_limit',
+    'SendScheduler': '.send_scheduler',
+    'AutoDeletePolicies': '.auto_delete_policy',
+    'progress_callback': '.progress',
+    'humanbytes': '.progress',
+    'TimeFormatter': '.progress',
+    'ThrottledStatus': '.progress',
+    'is_admin': '.admin_check',
+}
+
+_submodules = ('short_id', 'metrics', 'tracing', 'lifecycle', 'services', 'startup', 'send_scheduler')
+
+
+def __getattr__(name):
+    if name in _exports:
+        value = getattr(importlib.import_module(_exports[name], __name__), name)
+    elif name in _submodules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'ButtonManager',
+    'StorageManager',
+    'CallbackRouter',
+    'UserActivityTracker',
+    'RateLimiter',
+    'SendScheduler',
+    'AutoDeletePolicies',
     'progress_callback',
     'humanbytes',
     'TimeFormatter',
-    'is_admin'
+    'ThrottledStatus',
+    'is_admin',
+    'short_id',
+    'metrics',
+    'tracing',
+    'lifecycle',
+    'services',
+    'startup',
+    'send_scheduler'
 ]
@@ -1,20 +1,17 @@
 from typing import Union
-from pyrogram.types import Message, CallbackQuery
+from pyrogram.types import Message, CallbackQuery, InlineQuery
 import config
 
-def is_admin(update: Union[Message, CallbackQuery]) -> bool:
+def is_admin(update: Union[Message, CallbackQuery, InlineQuery]) -> bool:
     """
     Check if the user is an admin.
-    Works with both Message and CallbackQuery objects.
+    Works with Message, CallbackQuery and InlineQuery objects.
     
     Args:
-        update: The Message or CallbackQuery object to check
+        update: The Message, CallbackQuery or InlineQuery object to check
         
     Returns:
         bool: True if user is admin, False otherwise
     """
-    user_id = (
-        update.from_user.id if isinstance(update, Message)
-        else update.message.from_user.id
-    )
-    return user_id in config.ADMIN_IDS
+    # For callbacks this is whoever pressed the button, not the bot that sent the message
+    return update.from_user.id in config.ADMIN_IDS
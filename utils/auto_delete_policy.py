@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+import config
+
+GLOBAL = "global"
+UPLOADER = "uploader"
+
+
+class AutoDeletePolicies:
+    """
+    Resolve how many minutes a delivered file lives before auto-delete
+
+    The global and per-uploader policies live in the policies collection and
+    are held in memory. They are re-read every AUTO_DELETE_POLICY_TTL seconds
+    (so other workers pick up changes) or right after invalidate(). A stale
+    copy keeps being served while the refresh runs, so deliveries only wait
+    on Mongo for the very first load. File and batch overrides come from the
+    document being delivered and cost no query at all.
+    """
+
+    def __init__(self, db, ttl: int = None):
+        self.db = db
+        self.ttl = ttl if ttl is not None else config.AUTO_DELETE_POLICY_TTL
+        # (scope, key) -> minutes
+        self._policies: Optional[Dict[Tuple[str, Any], int]] = None
+        self._loaded_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _load(self) -> None:
+        try:
+            policies = await self.db.get_policies()
+        except Exception as e:
+            print(f"Error loading auto-delete policies: {str(e)}")
+            if self._policies is None:
+                raise
+            return
+        self._policies = {(p["scope"], p.get("key")): p["minutes"] for p in policies}
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self) -> asyncio.Task:
+        # One reload at a time, concurrent callers share it
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+        return self._refresh_task
+
+    async def _current(self) -> Dict[Tuple[str, Any], int]:
+        if self._policies is None:
+            await asyncio.shield(self._refresh())
+        elif time.monotonic() - self._loaded_at >= self.ttl:
+            self._refresh()
+        return self._policies
+
+    def invalidate(self) -> None:
+        """Mark the cached policies stale, the next lookup starts a reload"""
+        self._loaded_at = 0.0
+
+    async def minutes(self, uploader_id: int = None, override: int = None) -> int:
+        """Most specific policy wins: override, then uploader, then global"""
+        if override:
+            return override
+        policies = await self._current()
+        return (
+            policies.get((UPLOADER, uploader_id))
+            or policies.get((GLOBAL, None))
+            or config.DEFAULT_AUTO_DELETE
+        )
+
+    async def for_file(self, file_data: Dict[str, Any]) -> Optional[int]:
+        """Minutes for a file document, None if it isn't auto-deleted"""
+        if not file_data.get("auto_delete"):
+            return None
+        return await self.minutes(file_data.get("uploader_id"), file_data.get("auto_delete_time"))
+
+    async def for_batch(self, batch_data: Dict[str, Any]) -> int:
+        return await self.minutes(batch_data.get("admin_id"), batch_data.get("auto_delete_time"))
+
+    async def set(self, scope: str, key: Any, minutes: Optional[int]) -> None:
+        """Store a global or uploader policy, None removes it"""
+        await self.db.set_policy(scope, key, minutes)
+        self.invalidate()
+        # Reload now rather than in the background so this worker sees the change right away
+        await self._load()
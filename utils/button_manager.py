@@ -1,17 +1,58 @@
-from typing import List, Union
+from functools import lru_cache
+from typing import Dict, List, Union
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from . import tracing
 import config
 import logging
 from pyrogram.errors import UserNotParticipant, BadRequest
 from pyrogram.enums import ChatMemberStatus
 from pyrogram import Client
 
+@lru_cache(maxsize=512)
+def _file_markup(file_uuid: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Download 📥", callback_data=f"download_{file_uuid}"),
+            InlineKeyboardButton("Share Link 🔗", callback_data=f"share_{file_uuid}")
+        ],
+        [
+            InlineKeyboardButton("Channel 📢", url=config.CHANNEL_LINK)
+        ]
+    ])
+
 class ButtonManager:
+    # Markups and texts that only depend on config, shared by all instances
+    _static: Dict[str, Union[InlineKeyboardMarkup, str]] = {}
+
     def __init__(self):
         self.db_channel = config.DB_CHANNEL_ID
         self.force_sub_channels = config.FORCE_SUB_CHANNELS
         self.force_sub_links = config.FORCE_SUB_LINKS
+        if not ButtonManager._static:
+            ButtonManager._static = self._build_static()
+
+    def _build_static(self) -> Dict[str, Union[InlineKeyboardMarkup, str]]:
+        return {
+            "start": self._build_start_button(),
+            "help": self._build_help_button(),
+            "about": self._build_about_button(),
+            "force_sub": self._build_force_sub_buttons(),
+            # user_mention is the only per-user field left in START_TEXT
+            "start_text": config.Messages.START_TEXT.replace("{bot_name}", config.BOT_NAME),
+            "about_text": config.Messages.ABOUT_TEXT.format(
+                bot_name=config.BOT_NAME,
+                version=config.BOT_VERSION
+            ),
+        }
+
+    def start_text(self, user_mention: str) -> str:
+        return self._static["start_text"].replace("{user_mention}", user_mention)
 
+    @property
+    def about_text(self) -> str:
+        return self._static["about_text"]
+
+    @tracing.traced("check_force_sub")
     async def check_force_sub(self, client: Client, user_id: int) -> bool:
         """Check user's subscription status in configured channels"""
         if not self.force_sub_channels:
@@ -35,6 +76,10 @@ class ButtonManager:
         return True
 
     def get_force_sub_buttons(self) -> InlineKeyboardMarkup:
+        """Force subscription buttons for configured channels"""
+        return self._static["force_sub"]
+
+    def _build_force_sub_buttons(self) -> InlineKeyboardMarkup:
         """Generate force subscription buttons for configured channels"""
         buttons = []
         
@@ -64,6 +109,10 @@ class ButtonManager:
         return InlineKeyboardMarkup(buttons)
 
     def start_button(self) -> InlineKeyboardMarkup:
+        """Start menu buttons"""
+        return self._static["start"]
+
+    def _build_start_button(self) -> InlineKeyboardMarkup:
         """Create start menu buttons"""
         buttons = [
             [
@@ -78,6 +127,10 @@ class ButtonManager:
         return InlineKeyboardMarkup(buttons)
 
     def help_button(self) -> InlineKeyboardMarkup:
+        """Help menu buttons"""
+        return self._static["help"]
+
+    def _build_help_button(self) -> InlineKeyboardMarkup:
         """Create help menu buttons"""
         buttons = [
             [
@@ -91,6 +144,10 @@ class ButtonManager:
         return InlineKeyboardMarkup(buttons)
 
     def about_button(self) -> InlineKeyboardMarkup:
+        """About menu buttons"""
+        return self._static["about"]
+
+    def _build_about_button(self) -> InlineKeyboardMarkup:
         """Create about menu buttons"""
         buttons = [
             [
@@ -104,17 +161,8 @@ class ButtonManager:
         return InlineKeyboardMarkup(buttons)
 
     def file_button(self, file_uuid: str) -> InlineKeyboardMarkup:
-        """Create file action buttons"""
-        buttons = [
-            [
-                InlineKeyboardButton("Download 📥", callback_data=f"download_{file_uuid}"),
-                InlineKeyboardButton("Share Link 🔗", callback_data=f"share_{file_uuid}")
-            ],
-            [
-                InlineKeyboardButton("Channel 📢", url=config.CHANNEL_LINK)
-            ]
-        ]
-        return InlineKeyboardMarkup(buttons)
+        """File action buttons, cached per uuid"""
+        return _file_markup(file_uuid)
 
     async def handle_subscription_check(self, client: Client, user_id: int) -> tuple[bool, InlineKeyboardMarkup]:
         """Handle subscription check and return appropriate buttons"""
@@ -126,10 +174,7 @@ class ButtonManager:
         try:
             is_subbed, markup = await self.handle_subscription_check(client, callback_query.from_user.id)
             await callback_query.message.edit_text(
-                config.Messages.START_TEXT.format(
-                    bot_name=config.BOT_NAME,
-                    user_mention=callback_query.from_user.mention
-                ) if is_subbed else config.Messages.FORCE_SUB_TEXT,
+                self.start_text(callback_query.from_user.mention) if is_subbed else config.Messages.FORCE_SUB_TEXT,
                 reply_markup=markup,
                 disable_web_page_preview=True
             )
@@ -153,10 +198,7 @@ class ButtonManager:
         try:
             is_subbed, markup = await self.handle_subscription_check(client, callback_query.from_user.id)
             await callback_query.message.edit_text(
-                config.Messages.ABOUT_TEXT.format(
-                    bot_name=config.BOT_NAME,
-                    version=config.BOT_VERSION
-                ) if is_subbed else config.Messages.FORCE_SUB_TEXT,
+                self.about_text if is_subbed else config.Messages.FORCE_SUB_TEXT,
                 reply_markup=markup,
                 disable_web_page_preview=True
             )
@@ -0,0 +1,99 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from pyrogram import Client
+from pyrogram.types import CallbackQuery
+
+# Handlers get (client, callback, payload) and may return alert text.
+# The router answers every callback exactly once with that text.
+RouteHandler = Callable[[Client, CallbackQuery, Any], Awaitable[Optional[str]]]
+
+SEPARATOR = "_"
+
+
+class CallbackRouter:
+    """Dispatch callback data to handlers by exact value or `prefix_` match"""
+
+    def __init__(self):
+        self._exact: Dict[str, Tuple[str, RouteHandler, None]] = {}
+        self._prefixes: Dict[str, Tuple[str, RouteHandler, Callable[[str], Any]]] = {}
+        # route name -> [calls, total seconds, max seconds]
+        self.stats: Dict[str, list] = {}
+
+    def exact(self, value: str):
+        """Register a handler for callback data equal to value"""
+        def decorator(func: RouteHandler) -> RouteHandler:
+            self._exact[value] = (value, func, None)
+            return func
+        return decorator
+
+    def prefix(self, prefix: str, parse: Callable[[str], Any] = str):
+        """Register a handler for `prefix_<payload>`, payload is converted with parse"""
+        if not prefix.endswith(SEPARATOR):
+            prefix += SEPARATOR
+
+        def decorator(func: RouteHandler) -> RouteHandler:
+            self._prefixes[prefix] = (prefix, func, parse)
+            return func
+        return decorator
+
+    def resolve(self, data: str) -> Optional[Tuple[str, RouteHandler, Any]]:
+        """Find the route for callback data and parse its payload"""
+        route = self._exact.get(data)
+        if route:
+            return route[0], route[1], None
+
+        # Only the separator positions of the data are probed, longest prefix wins,
+        # so lookup cost does not grow with the number of registered routes
+        end = data.rfind(SEPARATOR)
+        while end > 0:
+            route = self._prefixes.get(data[:end + 1])
+            if route:
+                name, func, parse = route
+                return name, func, parse(data[end + 1:])
+            end = data.rfind(SEPARATOR, 0, end)
+        return None
+
+    def _record(self, name: str, elapsed: float) -> None:
+        stats = self.stats.get(name)
+        if stats is None:
+            self.stats[name] = [1, elapsed, elapsed]
+            return
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+
+    async def dispatch(self, client: Client, callback: CallbackQuery) -> None:
+        alert = None
+        try:
+            route = self.resolve(callback.data or "")
+        except (ValueError, TypeError):
+            route = None
+            alert = "Invalid button data!"
+
+        if route:
+            name, func, payload = route
+            start = time.perf_counter()
+            try:
+                alert = await func(client, callback, payload)
+            except Exception as e:
+                print(f"Error in callback route {name}: {str(e)}")
+                alert = f"Error: {str(e)}"
+            finally:
+                self._record(name, time.perf_counter() - start)
+
+        try:
+            await callback.answer(alert, show_alert=bool(alert))
+        except Exception as e:
+            print(f"Error answering callback: {str(e)}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-route call count and latency in milliseconds"""
+        return {
+            name: {
+                "calls": calls,
+                "avg_ms": total / calls * 1000,
+                "max_ms": longest * 1000,
+            }
+            for name, (calls, total, longest) in self.stats.items()
+        }
@@ -0,0 +1,127 @@
+import asyncio
+import mmap
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from . import metrics
+
+ChunkKey = Tuple[str, int]
+
+# A .tmp file this old is a write that died with its process
+TMP_GRACE = 600
+
+
+class ChunkCache:
+    """
+    Fixed-size file chunks on local disk, keyed by (uuid, chunk index)
+
+    Total size is capped at max_bytes with least-recently-used eviction.
+    Concurrent misses for the same chunk share one download.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index: "OrderedDict[ChunkKey, int]" = OrderedDict()
+        self._inflight: Dict[ChunkKey, asyncio.Task] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: ChunkKey) -> str:
+        uuid, index = key
+        return os.path.join(self.directory, uuid, f"{index}.chunk")
+
+    def _load_index(self) -> None:
+        """Pick up chunks left by a previous run, oldest access first"""
+        entries = []
+        for uuid in os.listdir(self.directory):
+            folder = os.path.join(self.directory, uuid)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                stat = os.stat(path)
+                if name.endswith(".tmp"):
+                    # Possibly still being written, only clear out abandoned ones
+                    if time.time() - stat.st_mtime > TMP_GRACE:
+                        os.remove(path)
+                    continue
+                index = name[:-len(".chunk")] if name.endswith(".chunk") else ""
+                if not index.isdigit():
+                    # Not a chunk, it would take up space the cap doesn't see
+                    os.remove(path)
+                    continue
+                entries.append((stat.st_atime, (uuid, int(index)), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        metrics.CACHE_BYTES.set(self.total_bytes)
+
+    @staticmethod
+    def _read(path: str, lo: int, hi: int) -> bytes:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[lo:hi]
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def get(self, key: ChunkKey, lo: int, hi: int) -> Optional[bytes]:
+        if key not in self._index:
+            return None
+        self._index.move_to_end(key)
+        try:
+            return await asyncio.to_thread(self._read, self._path(key), lo, hi)
+        except (FileNotFoundError, ValueError):
+            # Evicted or truncated underneath us
+            size = self._index.pop(key, 0)
+            self.total_bytes -= size
+            return None
+
+    async def _fetch_and_store(self, key: ChunkKey, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        chunk = await fetch()
+        try:
+            await asyncio.to_thread(self._write, self._path(key), chunk)
+        except OSError as e:
+            print(f"Chunk cache write failed: {str(e)}")
+            return chunk
+        if key not in self._index:
+            self._index[key] = len(chunk)
+            self.total_bytes += len(chunk)
+            self._evict()
+        return chunk
+
+    async def get_or_fetch(self, key: ChunkKey, fetch: Callable[[], Awaitable[bytes]], lo: int, hi: int) -> bytes:
+        """Return bytes lo..hi of a chunk, downloading it at most once per node"""
+        data = await self.get(key, lo, hi)
+        if data is not None:
+            metrics.CACHE_REQUESTS.inc("hit")
+            return data
+
+        task = self._inflight.get(key)
+        if task is None:
+            metrics.CACHE_REQUESTS.inc("miss")
+            task = asyncio.create_task(self._fetch_and_store(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.CACHE_REQUESTS.inc("coalesced")
+        # Shielded so one client disconnecting doesn't cancel the shared download
+        chunk = await asyncio.shield(task)
+        return chunk if (lo, hi) == (0, len(chunk)) else chunk[lo:hi]
@@ -0,0 +1,53 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class Coalescer:
+    """
+    Run one call per key at a time and share its result
+
+    Callers arriving while a call for their key is running wait for it
+    instead of starting their own. A successful result is also handed to
+    callers arriving up to `window` seconds after it finished.
+    """
+
+    def __init__(self, window: float = 0):
+        self.window = window
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # key -> (finished at, result), oldest first
+        self._recent: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._recent:
+            key, (finished_at, _) = next(iter(self._recent.items()))
+            if now - finished_at < self.window:
+                break
+            del self._recent[key]
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if self.window and not task.cancelled() and task.exception() is None:
+            self._recent[key] = (time.monotonic(), task.result())
+            self._recent.move_to_end(key)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, True) for the caller that ran func, (result, False) for duplicates"""
+        now = time.monotonic()
+        self._expire(now)
+        if key in self._recent:
+            return self._recent[key][1], False
+
+        task = self._inflight.get(key)
+        if task is not None:
+            # Shielded so a duplicate going away doesn't cancel the shared call
+            return await asyncio.shield(task), False
+
+        task = asyncio.create_task(func())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), True
+
+    def __len__(self) -> int:
+        return len(self._inflight)
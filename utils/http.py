@@ -0,0 +1,25 @@
+from typing import Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+# One pooled session for all outbound HTTP (keepalive, shortener, webhooks)
+_session: Optional[ClientSession] = None
+
+DEFAULT_TIMEOUT = ClientTimeout(total=15, connect=5)
+
+
+def get_session() -> ClientSession:
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None or _session.closed:
+        _session = ClientSession(
+            connector=TCPConnector(limit=100, ttl_dns_cache=300),
+            timeout=DEFAULT_TIMEOUT,
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import config
+
+JobFunc = Callable[[], Awaitable[None]]
+
+
+class LeaderLease:
+    """
+    Leader election through a single lease document in Mongo
+
+    Whoever holds an unexpired lease is leader. The holder renews it every
+    ttl/3 seconds, if it dies the lease expires and another worker takes over.
+    """
+
+    def __init__(self, collection, name: str = "background-jobs", ttl: int = None):
+        self.collection = collection
+        self.name = name
+        self.ttl = ttl or config.LEADER_LEASE_TTL
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+
+    async def try_acquire(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            lease = await self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"holder": self.holder}, {"expires_at": {"$lt": now}}],
+                },
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self.is_leader = lease is not None and lease["holder"] == self.holder
+        except DuplicateKeyError:
+            # Lease exists and is held by someone else
+            self.is_leader = False
+        except Exception as e:
+            print(f"Leader lease renewal failed: {str(e)}")
+            self.is_leader = False
+        return self.is_leader
+
+    async def release(self) -> None:
+        if self.is_leader:
+            await self.collection.delete_one({"_id": self.name, "holder": self.holder})
+            self.is_leader = False
+
+
+class WorkerPresence:
+    """
+    Count the workers that are running right now
+
+    Every worker keeps a heartbeat document next to the leader lease,
+    refreshed with it every ttl/3 seconds. Documents not refreshed within
+    ttl belong to workers that are gone and aren't counted.
+    """
+
+    def __init__(self, collection, holder: str, ttl: int = None,
+                 on_change: Callable[[int], None] = None):
+        self.collection = collection
+        self.ttl = ttl or config.LEADER_LEASE_TTL
+        self._id = f"worker:{holder}"
+        self.on_change = on_change
+        self.count: Optional[int] = None
+
+    async def beat(self) -> Optional[int]:
+        now = datetime.utcnow()
+        try:
+            await self.collection.update_one(
+                {"_id": self._id},
+                {"$set": {"kind": "worker", "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+            )
+            count = await self.collection.count_documents({"kind": "worker", "expires_at": {"$gt": now}})
+        except Exception as e:
+            print(f"Worker heartbeat failed: {str(e)}")
+            return self.count
+        if count != self.count:
+            self.count = count
+            if self.on_change:
+                self.on_change(count)
+        return count
+
+    async def leave(self) -> None:
+        await self.collection.delete_one({"_id": self._id})
+
+
+class JobRunner:
+    """Run registered periodic jobs, only on the worker holding the leader lease"""
+
+    def __init__(self, lease: LeaderLease, presence: WorkerPresence = None):
+        self.lease = lease
+        self.presence = presence
+        self._jobs: List[Tuple[str, int, JobFunc]] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def register(self, name: str, interval: int, func: JobFunc) -> None:
+        self._jobs.append((name, interval, func))
+
+    def start(self) -> None:
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            if self.presence:
+                await self.presence.beat()
+            was_leader = self.lease.is_leader
+            is_leader = await self.lease.try_acquire()
+            if is_leader and not was_leader:
+                print(f"Became leader ({self.lease.holder}), starting background jobs")
+                self._start_jobs()
+            elif was_leader and not is_leader:
+                print(f"Lost leadership ({self.lease.holder}), stopping background jobs")
+                self._stop_jobs()
+            await asyncio.sleep(self.lease.ttl / 3)
+
+    def _start_jobs(self) -> None:
+        for name, interval, func in self._jobs:
+            self._tasks[name] = asyncio.create_task(self._run_job(name, interval, func))
+
+    def _stop_jobs(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def _run_job(self, name: str, interval: int, func: JobFunc) -> None:
+        while True:
+            try:
+                await func()
+            except Exception as e:
+                print(f"Background job {name} failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def stop(self) -> None:
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        self._stop_jobs()
+        try:
+            if self.presence:
+                await self.presence.leave()
+            await self.lease.release()
+        except Exception as e:
+            print(f"Leader lease release failed: {str(e)}")
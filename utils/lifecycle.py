@@ -0,0 +1,67 @@
+import asyncio
+from typing import Coroutine, Set
+
+# Set once shutdown starts, the client stops queueing new updates
+draining = False
+
+_in_flight = 0
+_idle = asyncio.Event()
+_idle.set()
+_background: Set[asyncio.Task] = set()
+
+
+def begin_update() -> None:
+    """Mark a handler call as started"""
+    global _in_flight
+    _in_flight += 1
+    _idle.clear()
+
+
+def end_update() -> None:
+    global _in_flight
+    _in_flight -= 1
+    if _in_flight <= 0:
+        _in_flight = 0
+        _idle.set()
+
+
+def in_flight() -> int:
+    return _in_flight
+
+
+def start_draining() -> None:
+    global draining
+    draining = True
+
+
+async def wait_idle(timeout: float, queue: asyncio.Queue = None) -> bool:
+    """
+    Wait for the updates already in `queue` and the in-flight handler calls
+    to finish, False if the deadline passed
+    """
+    async def idle():
+        if queue is not None:
+            await queue.join()
+        await _idle.wait()
+
+    try:
+        await asyncio.wait_for(idle(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+def spawn(coro: Coroutine) -> asyncio.Task:
+    """create_task that keeps a reference so shutdown can find the task"""
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+async def cancel_background() -> int:
+    tasks = list(_background)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return len(tasks)
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+from pyrogram import StopPropagation
+from pyrogram.errors import FloodWait
+from . import tracing, lifecycle
+
+# Metric objects in registration order, rendered by /metrics
+REGISTRY: List["_Metric"] = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A settable value, or one read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), func: Callable[[], float] = None):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._func = func
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values: str) -> float:
+        if self._func is not None:
+            return self._func()
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        if self._func is not None:
+            try:
+                return [f"{self.name} {self._func()}"]
+            except Exception:
+                return []
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        data = self._values.get(label_values)
+        if data is None:
+            data = self._values[label_values] = [0] * (len(self.buckets) + 2)
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, data in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {data[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Shared metrics fed by handlers, the database layer and background workers
+HANDLER_CALLS = Counter("alphashare_handler_calls_total", "Handled updates by handler and outcome", ("handler", "outcome"))
+HANDLER_LATENCY = Histogram("alphashare_handler_seconds", "Handler latency in seconds", ("handler",))
+FLOOD_WAITS = Counter("alphashare_flood_waits_total", "FloodWait errors raised by Telegram", ("source",))
+MONGO_LATENCY = Histogram("alphashare_mongo_seconds", "Database method latency in seconds", ("method",))
+MONGO_ERRORS = Counter("alphashare_mongo_errors_total", "Failed database method calls", ("method",))
+DELETIONS = Counter("alphashare_auto_deletions_total", "Auto-delete jobs by result", ("result",))
+PENDING_DELETIONS = Gauge("alphashare_pending_deletions", "Auto-delete jobs waiting to run")
+PENDING_USER_WRITES = Gauge("alphashare_pending_user_writes", "User activity upserts waiting for the next bulk flush")
+ACTIVE_STREAMS = Gauge("alphashare_active_streams", "HTTP downloads in progress")
+STREAMED_BYTES = Counter("alphashare_streamed_bytes_total", "Bytes served by the HTTP download gateway")
+CACHE_REQUESTS = Counter("alphashare_chunk_cache_requests_total", "Stream chunk cache lookups by result", ("result",))
+CACHE_BYTES = Gauge("alphashare_chunk_cache_bytes", "Bytes held in the stream chunk cache")
+BROADCAST_MESSAGES = Counter("alphashare_broadcast_messages_total", "Broadcast sends by result", ("result",))
+SEND_QUEUE = Gauge("alphashare_send_queue", "Messages waiting in the send scheduler by priority", ("priority",))
+SEND_WAIT = Histogram("alphashare_send_wait_seconds", "Time messages waited in the send scheduler by priority", ("priority",))
+DELIVERIES = Counter("alphashare_deliveries_total", "File delivery requests by result", ("result",))
+INLINE_QUERIES = Counter("alphashare_inline_queries_total", "Inline searches by result", ("result",))
+RATE_LIMITED = Counter("alphashare_rate_limited_total", "Requests rejected by the rate limiter by limit", ("limit",))
+
+
+def timed_methods(histogram: Histogram, errors: Counter = None):
+    """Class decorator timing every public coroutine method into histogram"""
+    def decorator(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(func):
+                continue
+            setattr(cls, name, _timed(func, name, histogram, errors))
+        return cls
+    return decorator
+
+
+def _timed(func, name: str, histogram: Histogram, errors: Counter = None):
+    span_name = f"db.{name}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            if errors is not None:
+                errors.inc(name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            histogram.observe(elapsed, name)
+            tracing.record_span(span_name, elapsed)
+    return wrapper
+
+
+def instrument_handlers(client) -> None:
+    """Wrap every registered Pyrogram handler callback with metrics and span tracing"""
+    for handlers in client.dispatcher.groups.values():
+        for handler in handlers:
+            callback = handler.callback
+            if getattr(callback, "__instrumented__", False) or not asyncio.iscoroutinefunction(callback):
+                continue
+            handler.callback = _instrumented_handler(callback)
+
+
+def _instrumented_handler(callback):
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(client, update, *args):
+        lifecycle.begin_update()
+        start = time.perf_counter()
+        outcome = "ok"
+        token = tracing.start_trace()
+        try:
+            return await callback(client, update, *args)
+        except StopPropagation:
+            raise
+        except Exception as e:
+            if isinstance(e, FloodWait):
+                outcome = "flood_wait"
+                FLOOD_WAITS.inc(name)
+            else:
+                outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            HANDLER_CALLS.inc(name, outcome)
+            HANDLER_LATENCY.observe(elapsed, name)
+            tracing.finish_trace(name, elapsed, token)
+            lifecycle.end_update()
+
+    wrapper.__instrumented__ = True
+    return wrapper
@@ -2,6 +2,7 @@ import math
 import time
 from typing import Union
 from pyrogram.types import Message
+import config
 
 async def progress_callback(
     current: int,
@@ -64,3 +65,23 @@ def TimeFormatter(seconds: int) -> str:
     )
     return tmp
     
+
+class ThrottledStatus:
+    """Edit a status message at most once per interval, long jobs would otherwise spend the send budget on it"""
+
+    def __init__(self, message: Message, interval: float = None):
+        self.message = message
+        self.interval = config.BULK_PROGRESS_INTERVAL if interval is None else interval
+        self._edited_at = 0.0
+        self._text = message.text
+
+    async def update(self, text: str, force: bool = False) -> None:
+        now = time.monotonic()
+        if text == self._text or (not force and now - self._edited_at < self.interval):
+            return
+        self._edited_at = now
+        self._text = text
+        try:
+            await self.message.edit_text(text)
+        except Exception:
+            pass
@@ -0,0 +1,74 @@
+import time
+from typing import Dict, Tuple
+from . import metrics
+
+# (tokens, last refill, already warned) per user
+Bucket = Tuple[float, float, bool]
+
+
+class RateLimiter:
+    """
+    Token buckets per user plus one global bucket
+
+    A user may spend `burst` requests at once, refilled at `per_minute`.
+    The global bucket caps everyone together at `global_per_second`.
+    Users whose bucket has refilled completely are dropped every
+    `sweep_interval` seconds, so idle users cost nothing.
+    """
+
+    def __init__(self, burst: int, per_minute: float, global_per_second: float, sweep_interval: int = 60):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.global_rate = global_per_second
+        self.global_burst = max(1.0, global_per_second * 2)
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[int, Bucket] = {}
+        self._global: Tuple[float, float] = (self.global_burst, time.monotonic())
+        self._swept_at = time.monotonic()
+
+    def _refill(self, tokens: float, updated_at: float, now: float, rate: float, burst: float) -> float:
+        return min(burst, tokens + (now - updated_at) * rate)
+
+    def check(self, user_id: int) -> str:
+        """Spend a token for user_id, returns "ok", "user" or "global" for which limit was hit"""
+        now = time.monotonic()
+        if now - self._swept_at > self.sweep_interval:
+            self.sweep(now)
+
+        tokens, updated_at, warned = self._buckets.get(user_id, (self.burst, now, False))
+        tokens = self._refill(tokens, updated_at, now, self.rate, self.burst)
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now, warned)
+            metrics.RATE_LIMITED.inc("user")
+            return "user"
+
+        global_tokens = self._refill(*self._global, now, self.global_rate, self.global_burst)
+        if global_tokens < 1:
+            self._global = (global_tokens, now)
+            self._buckets[user_id] = (tokens, now, warned)
+            metrics.RATE_LIMITED.inc("global")
+            return "global"
+
+        self._global = (global_tokens - 1, now)
+        self._buckets[user_id] = (tokens - 1, now, False)
+        return "ok"
+
+    def should_warn(self, user_id: int) -> bool:
+        """True the first time a user is rejected since they were last allowed"""
+        bucket = self._buckets.get(user_id)
+        if bucket is None or bucket[2]:
+            return False
+        self._buckets[user_id] = (bucket[0], bucket[1], True)
+        return True
+
+    def sweep(self, now: float = None) -> int:
+        now = now or time.monotonic()
+        full_after = self.burst / self.rate if self.rate else float("inf")
+        idle = [user_id for user_id, (_, updated_at, _) in self._buckets.items() if now - updated_at >= full_after]
+        for user_id in idle:
+            del self._buckets[user_id]
+        self._swept_at = now
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
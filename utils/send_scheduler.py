@@ -0,0 +1,278 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from pyrogram import raw, utils as pyrogram_utils
+from pyrogram.errors import FloodWait
+from . import metrics
+import config
+
+# Priority classes, lower is served first
+INTERACTIVE = 0
+NOTICE = 1
+BULK = 2
+PRIORITY_NAMES = ("interactive", "notice", "bulk")
+
+# FloodWaits longer than this fail the send instead of holding its chat
+MAX_RETRY_WAIT = 30
+
+# Raw calls that post or edit a message, these count against the send limits
+SEND_FUNCTIONS = (
+    raw.functions.messages.SendMessage,
+    raw.functions.messages.SendMedia,
+    raw.functions.messages.SendMultiMedia,
+    raw.functions.messages.ForwardMessages,
+    raw.functions.messages.EditMessage,
+)
+
+_current_priority: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Sends made inside this block (and tasks it spawns) use the given priority"""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def send_target(query) -> Optional[int]:
+    """Chat id a raw query sends to, None if it isn't a send"""
+    if not isinstance(query, SEND_FUNCTIONS):
+        return None
+    peer = getattr(query, "to_peer", None) or query.peer
+    try:
+        return pyrogram_utils.get_peer_id(peer)
+    except ValueError:
+        # InputPeerSelf and friends
+        return 0
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "func", "args", "kwargs", "future", "queued_at", "attempts")
+
+    def __init__(self, priority: int, seq: int, func, args, kwargs, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SendScheduler:
+    """
+    Pace every outgoing message through one queue
+
+    Each chat has its own queue and token bucket (SEND_CHAT_BURST messages,
+    refilled at one per SEND_CHAT_INTERVAL seconds). A global bucket caps
+    all chats together at SEND_GLOBAL_PER_SECOND split over the running
+    workers. Among chats that may send, the one whose next message has the
+    best priority goes first, chats of equal priority take turns.
+    """
+
+    def __init__(self, global_per_second: float = None, chat_interval: float = None,
+                 chat_burst: int = None, max_retries: int = 3):
+        self.global_per_second = global_per_second or config.SEND_GLOBAL_PER_SECOND
+        self.chat_rate = 1 / (chat_interval or config.SEND_CHAT_INTERVAL)
+        self.chat_burst = chat_burst or config.SEND_CHAT_BURST
+        self.max_retries = max_retries
+        # WORKER_COUNT until the first heartbeat says how many workers really run
+        self.set_workers(config.WORKER_COUNT)
+        self._global: Tuple[float, float] = (self.global_burst, time.monotonic())
+        self._chat_tokens: Dict[int, Tuple[float, float]] = {}
+        self._queues: Dict[int, List[_Job]] = {}
+        # Chat ids that may send now, one deque per priority (entries can be stale)
+        self._ready: List[Deque[int]] = [deque() for _ in PRIORITY_NAMES]
+        # (time the chat may send again, chat id)
+        self._cooling: List[Tuple[float, int]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._sends = 0
+
+    def set_workers(self, count: int) -> None:
+        """The token is shared by all running workers, each gets an equal slice of the budget"""
+        self.global_rate = self.global_per_second / max(1, count)
+        # Burst plus one second of refill must stay under the real limit
+        self.global_burst = max(1.0, self.global_rate / 10)
+
+    async def submit(self, chat_id: int, func: Callable[..., Awaitable[Any]], *args,
+                     level: int = None, **kwargs) -> Any:
+        """Run func(*args, **kwargs) once chat_id and the global budget allow, returns its result"""
+        level = current_priority() if level is None else level
+        job = _Job(level, next(self._seq), func, args, kwargs, asyncio.get_running_loop().create_future())
+        self._enqueue(chat_id, job)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await job.future
+
+    def _enqueue(self, chat_id: int, job: _Job) -> None:
+        heapq.heappush(self._queues.setdefault(chat_id, []), job)
+        metrics.SEND_QUEUE.inc(PRIORITY_NAMES[job.priority])
+        self._schedule(chat_id, time.monotonic())
+        self._wakeup.set()
+
+    def _chat_available_at(self, chat_id: int, now: float) -> float:
+        tokens, updated_at = self._chat_tokens.get(chat_id, (self.chat_burst, now))
+        tokens = min(self.chat_burst, tokens + (now - updated_at) * self.chat_rate)
+        return now if tokens >= 1 else now + (1 - tokens) / self.chat_rate
+
+    def _schedule(self, chat_id: int, now: float) -> None:
+        queue = self._queues.get(chat_id)
+        if not queue:
+            return
+        available_at = self._chat_available_at(chat_id, now)
+        if available_at > now:
+            heapq.heappush(self._cooling, (available_at, chat_id))
+        else:
+            self._ready[queue[0].priority].append(chat_id)
+
+    def _drop_cancelled(self, chat_id: int) -> List[_Job]:
+        queue = self._queues.get(chat_id, [])
+        while queue and queue[0].future.done():
+            # The caller gave up, e.g. its handler was cancelled
+            metrics.SEND_QUEUE.dec(PRIORITY_NAMES[heapq.heappop(queue).priority])
+        if not queue:
+            self._queues.pop(chat_id, None)
+        return queue
+
+    def _pop_ready(self, now: float) -> Optional[Tuple[int, _Job]]:
+        for level, ready in enumerate(self._ready):
+            while ready:
+                chat_id = ready.popleft()
+                queue = self._drop_cancelled(chat_id)
+                if not queue:
+                    continue
+                if queue[0].priority != level or self._chat_available_at(chat_id, now) > now:
+                    # Stale entry, the chat is also queued elsewhere
+                    continue
+                return chat_id, heapq.heappop(queue)
+        return None
+
+    def _spend_chat_token(self, chat_id: int, now: float) -> None:
+        tokens, updated_at = self._chat_tokens.get(chat_id, (self.chat_burst, now))
+        tokens = min(self.chat_burst, tokens + (now - updated_at) * self.chat_rate)
+        self._chat_tokens[chat_id] = (tokens - 1, now)
+
+    async def _take_global_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            tokens, updated_at = self._global
+            tokens = min(self.global_burst, tokens + (now - updated_at) * self.global_rate)
+            if tokens >= 1:
+                self._global = (tokens - 1, now)
+                return
+            self._global = (tokens, now)
+            await asyncio.sleep((1 - tokens) / self.global_rate)
+
+    def _prune(self, now: float) -> None:
+        """Forget chats whose bucket has refilled completely"""
+        full_after = self.chat_burst / self.chat_rate
+        self._chat_tokens = {
+            chat_id: bucket for chat_id, bucket in self._chat_tokens.items()
+            if now - bucket[1] < full_after or chat_id in self._queues
+        }
+
+    def _promote_cooled(self, now: float) -> None:
+        while self._cooling and self._cooling[0][0] <= now:
+            _, chat_id = heapq.heappop(self._cooling)
+            self._schedule(chat_id, now)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._promote_cooled(now)
+            if not any(self._ready):
+                if not self._queues:
+                    self._cooling.clear()
+                timeout = self._cooling[0][0] - now if self._cooling else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Wait for the global budget before choosing, so work that
+            # arrives in the meantime can still go first
+            await self._take_global_token()
+            now = time.monotonic()
+            self._promote_cooled(now)
+            picked = self._pop_ready(now)
+            if picked is None:
+                # Only stale entries, give the token back
+                tokens, updated_at = self._global
+                self._global = (min(self.global_burst, tokens + 1), updated_at)
+                continue
+
+            chat_id, job = picked
+            self._spend_chat_token(chat_id, now)
+            if self._queues.get(chat_id):
+                self._schedule(chat_id, now)
+            else:
+                self._queues.pop(chat_id, None)
+
+            task = asyncio.create_task(self._execute(chat_id, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+            self._sends += 1
+            if self._sends % 1000 == 0:
+                self._prune(now)
+
+    async def _execute(self, chat_id: int, job: _Job) -> None:
+        name = PRIORITY_NAMES[job.priority]
+        metrics.SEND_QUEUE.dec(name)
+        metrics.SEND_WAIT.observe(time.monotonic() - job.queued_at, name)
+        if job.future.done():
+            return
+        try:
+            result = await job.func(*job.args, **job.kwargs)
+        except FloodWait as e:
+            metrics.FLOOD_WAITS.inc("scheduler")
+            job.attempts += 1
+            wait = e.value if isinstance(e.value, (int, float)) else MAX_RETRY_WAIT + 1
+            if job.attempts > self.max_retries or wait > MAX_RETRY_WAIT or job.future.done():
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+            print(f"FloodWait {wait}s sending to {chat_id}, retrying")
+            # Hold the whole chat back until Telegram lets it send again
+            self._chat_tokens[chat_id] = (1 - wait * self.chat_rate, time.monotonic())
+            self._enqueue(chat_id, job)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def close(self) -> None:
+        """Stop dispatching, queued sends fail with CancelledError"""
+        if self._task:
+            self._task.cancel()
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        await asyncio.gather(*self._running, return_exceptions=True)
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Type, TypeVar
+
+T = TypeVar("T")
+
+# One instance per service class for the whole process
+_instances: Dict[type, Any] = {}
+
+
+def get(cls: Type[T]) -> T:
+    """Return the shared instance of cls, building it on first use"""
+    instance = _instances.get(cls)
+    if instance is None:
+        instance = _instances[cls] = cls()
+    return instance
+
+
+class Lazy:
+    """Module-level stand-in for a shared service, built on first attribute access"""
+
+    def __init__(self, cls: type):
+        self._cls = cls
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get(self._cls), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._cls.__name__}>"
+
+
+def lazy(cls: Type[T]) -> T:
+    return Lazy(cls)
@@ -0,0 +1,44 @@
+import secrets
+import string
+from typing import Optional
+
+ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+BASE = len(ALPHABET)
+# 63 random bits fit a signed int64 Mongo key and always encode to 11 chars
+BITS = 63
+LENGTH = 11
+_INDEX = {char: i for i, char in enumerate(ALPHABET)}
+
+
+def encode(value: int) -> str:
+    """Encode a non-negative integer as a fixed-width base62 string"""
+    chars = []
+    while value:
+        value, rem = divmod(value, BASE)
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars)).rjust(LENGTH, ALPHABET[0])
+
+
+def decode(key: str) -> Optional[int]:
+    """
+    Decode a short id back to its integer key
+
+    Returns None for anything that is not a short id (legacy uuids,
+    old 8-char batch ids), so callers can fall back to a string lookup.
+    """
+    if not isinstance(key, str) or len(key) != LENGTH:
+        return None
+    value = 0
+    for char in key:
+        digit = _INDEX.get(char)
+        if digit is None:
+            return None
+        value = value * BASE + digit
+    if value >> BITS:
+        return None
+    return value
+
+
+def generate() -> str:
+    """Create a new random short id"""
+    return encode(secrets.randbits(BITS))
@@ -0,0 +1,76 @@
+"""
+Startup profiling, enabled with STARTUP_PROFILE=1
+
+Imported first thing by main.py, so it must not pull in pyrogram or config.
+Records how long each module takes to import (including its own imports)
+and the time from process start to named milestones, such as the first
+update that made it through the handlers.
+"""
+import importlib.abc
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+enabled = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "on")
+
+_started = time.perf_counter()
+_imports: Dict[str, float] = {}
+_milestones: List[Tuple[str, float]] = []
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader):
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            _imports[module.__name__] = time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Wrap the loader of every module imported after install()"""
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader)
+            return spec
+        return None
+
+
+def install() -> None:
+    if enabled and not any(isinstance(f, _ImportTimer) for f in sys.meta_path):
+        sys.meta_path.insert(0, _ImportTimer())
+
+
+def mark(label: str) -> None:
+    """Record a milestone, measured from process start"""
+    if enabled:
+        _milestones.append((label, time.perf_counter() - _started))
+
+
+def report(top: int = 20) -> None:
+    if not enabled:
+        return
+    print("---- Startup profile ----")
+    for label, elapsed in _milestones:
+        print(f"{label:<28} {elapsed * 1000:>9.1f} ms")
+    print(f"Slowest imports (cumulative, {len(_imports)} modules):")
+    for name, elapsed in sorted(_imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {name:<40} {elapsed * 1000:>9.1f} ms")
+    print("-------------------------")
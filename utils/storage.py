@@ -0,0 +1,107 @@
+from bisect import bisect
+from hashlib import md5
+from typing import Any, Dict, List
+from pyrogram import Client
+from pyrogram.types import Message
+from pyrogram.errors import (
+    FloodWait,
+    MessageIdInvalid,
+    ChannelPrivate,
+    ChannelInvalid,
+    ChatForwardsRestricted,
+    ChatAdminRequired
+)
+from . import metrics, tracing
+import config
+
+# Errors caused by the stored copy or its channel, another replica may still work.
+# Anything else (FloodWait, UserIsBlocked, ...) is about the destination and
+# would fail the same way from every replica.
+SOURCE_ERRORS = (MessageIdInvalid, ChannelPrivate, ChannelInvalid, ChatForwardsRestricted, ChatAdminRequired)
+
+
+class StorageManager:
+    """Spread stored files over several storage channels using a consistent hash ring"""
+
+    VIRTUAL_NODES = 64
+
+    def __init__(self, channels: List[int] = None, replicas: int = None):
+        self.channels = list(channels or config.DB_CHANNEL_IDS)
+        self.replicas = max(1, min(replicas or config.STORAGE_REPLICAS, len(self.channels)))
+        self._ring = sorted(
+            (self._hash(f"{channel_id}:{vnode}"), channel_id)
+            for channel_id in self.channels
+            for vnode in range(self.VIRTUAL_NODES)
+        )
+        self._keys = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(md5(key.encode()).digest()[:8], "big")
+
+    def pick_channels(self, key: str) -> List[int]:
+        """Return the primary channel for a key followed by its replica channels"""
+        picked = []
+        start = bisect(self._keys, self._hash(key))
+        for i in range(len(self._ring)):
+            channel_id = self._ring[(start + i) % len(self._ring)][1]
+            if channel_id not in picked:
+                picked.append(channel_id)
+                if len(picked) == self.replicas:
+                    break
+        return picked
+
+    @tracing.traced("store")
+    async def store(self, message: Message, key: str) -> Dict[str, Any]:
+        """Forward a message to the channels owning the key"""
+        copies = []
+        for channel_id in self.pick_channels(key):
+            try:
+                stored = await message.forward(channel_id)
+                copies.append({"chat_id": channel_id, "message_id": stored.id})
+            except Exception as e:
+                # The primary copy must exist, replicas are best effort
+                if not copies:
+                    raise
+                print(f"Replica forward to {channel_id} failed: {str(e)}")
+        return {
+            "channel_id": copies[0]["chat_id"],
+            "message_id": copies[0]["message_id"],
+            "replicas": copies[1:],
+        }
+
+    @staticmethod
+    def locations(file_data: Dict[str, Any]) -> List[Dict[str, int]]:
+        """All stored copies of a file, primary first"""
+        primary = {
+            "chat_id": file_data.get("channel_id", config.DB_CHANNEL_ID),
+            # Batch entries saved before replicas only have file_id, the stored message id
+            "message_id": file_data.get("message_id", file_data.get("file_id")),
+        }
+        return [primary] + file_data.get("replicas", [])
+
+    @tracing.traced("deliver")
+    async def deliver(self, client: Client, file_data: Dict[str, Any], chat_id: int, **kwargs) -> Message:
+        """Copy a stored file to a chat, falling back to replicas when a copy is unusable"""
+        last_error = None
+        for location in self.locations(file_data):
+            try:
+                msg = await client.copy_message(
+                    chat_id=chat_id,
+                    from_chat_id=location["chat_id"],
+                    message_id=location["message_id"],
+                    **kwargs
+                )
+            except SOURCE_ERRORS as e:
+                print(f"Delivery from {location['chat_id']} failed: {str(e)}")
+                last_error = e
+                continue
+            except FloodWait:
+                metrics.FLOOD_WAITS.inc("delivery")
+                raise
+            if msg is not None:
+                return msg
+            # Pyrogram returns None instead of raising when the stored message was deleted
+            print(f"Delivery from {location['chat_id']} failed: stored message is gone")
+            last_error = ValueError("Stored message not found")
+        raise last_error
@@ -0,0 +1,36 @@
+import hashlib
+import hmac
+import time
+from typing import Optional
+import config
+
+# Signed, expiring /dl links: the bot issues one after its usual checks
+# (force-sub, auto-delete), the web server serves only those
+
+
+def streaming_enabled() -> bool:
+    """Direct links would bypass protect_content, so privacy mode turns them off"""
+    return config.HTTP_STREAMING and not config.PRIVACY_MODE
+
+
+def _signature(file_uuid: str, expires: int) -> str:
+    return hmac.new(config.STREAM_SECRET.encode(), f"{file_uuid}:{expires}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def download_link(file_uuid: str, ttl: int = None) -> Optional[str]:
+    """Signed /dl link valid for ttl seconds (at most STREAM_LINK_TTL), None if streaming is off"""
+    if not streaming_enabled() or not config.STREAM_BASE_URL:
+        return None
+    ttl = min(ttl or config.STREAM_LINK_TTL, config.STREAM_LINK_TTL)
+    expires = int(time.time()) + ttl
+    return f"{config.STREAM_BASE_URL}/dl/{file_uuid}?exp={expires}&sig={_signature(file_uuid, expires)}"
+
+
+def check_link(file_uuid: str, expires: str, signature: str) -> bool:
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(file_uuid, expires).encode(), (signature or "").encode())
@@ -0,0 +1,151 @@
+import re
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+from aiohttp import web
+from pyrogram import Client
+from pyrogram.types import Message
+from .storage import StorageManager
+from .chunk_cache import ChunkCache
+from .stream_links import check_link
+from . import metrics
+
+# Pyrogram's stream_media works in 1 MiB chunks, offsets are chunk indexes
+CHUNK_SIZE = 1024 * 1024
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end)
+
+    Returns None when the whole file should be served and raises
+    ValueError for ranges that can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges, fall back to the full body
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError("Empty range")
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class FileStreamer:
+    """Serve stored files over HTTP straight from Telegram, chunk by chunk"""
+
+    def __init__(self, client: Client, db, storage: StorageManager = None, cache: ChunkCache = None):
+        self.client = client
+        self.db = db
+        self.storage = storage or StorageManager()
+        self.cache = cache
+
+    async def get_media_message(self, file_data: dict) -> Optional[Message]:
+        for location in self.storage.locations(file_data):
+            try:
+                message = await self.client.get_messages(location["chat_id"], location["message_id"])
+                if message and message.media:
+                    return message
+            except Exception as e:
+                print(f"Stream lookup in {location['chat_id']} failed: {str(e)}")
+        return None
+
+    async def download_chunk(self, message: Message, index: int) -> bytes:
+        async for chunk in self.client.stream_media(message, offset=index, limit=1):
+            return chunk
+        return b""
+
+    async def iter_cached_range(self, file_uuid: str, message: Message, start: int, end: int) -> AsyncIterator[bytes]:
+        """Like iter_range, but every chunk goes through the disk cache"""
+        for index in range(start // CHUNK_SIZE, end // CHUNK_SIZE + 1):
+            chunk_start = index * CHUNK_SIZE
+            lo = max(start, chunk_start) - chunk_start
+            hi = min(end + 1, chunk_start + CHUNK_SIZE) - chunk_start
+            yield await self.cache.get_or_fetch(
+                (file_uuid, index),
+                lambda index=index: self.download_chunk(message, index),
+                lo,
+                hi
+            )
+
+    async def iter_range(self, message: Message, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield the bytes start..end (inclusive), holding at most one chunk in memory"""
+        first_chunk = start // CHUNK_SIZE
+        last_chunk = end // CHUNK_SIZE
+        position = first_chunk * CHUNK_SIZE
+        async for chunk in self.client.stream_media(
+            message, offset=first_chunk, limit=last_chunk - first_chunk + 1
+        ):
+            chunk_start, chunk_end = position, position + len(chunk)
+            position = chunk_end
+            lo = max(start, chunk_start) - chunk_start
+            hi = min(end + 1, chunk_end) - chunk_start
+            if lo == 0 and hi == len(chunk):
+                yield chunk
+            elif lo < hi:
+                yield chunk[lo:hi]
+            if chunk_end > end:
+                break
+
+    async def handle(self, request: web.Request, file_uuid: str) -> web.StreamResponse:
+        # Only links the bot issued after its usual checks, and only until they expire
+        if not check_link(file_uuid, request.query.get("exp"), request.query.get("sig")):
+            raise web.HTTPForbidden(text="Link is invalid or has expired, request the file from the bot again")
+
+        file_data = await self.db.get_file(file_uuid)
+        if not file_data:
+            raise web.HTTPNotFound(text="File not found")
+
+        message = await self.get_media_message(file_data)
+        if message is None:
+            raise web.HTTPNotFound(text="File is no longer available")
+
+        media = getattr(message, message.media.value)
+        size = media.file_size or file_data.get("file_size", 0)
+        mime_type = getattr(media, "mime_type", None) or "application/octet-stream"
+        file_name = file_data.get("file_name") or getattr(media, "file_name", None) or file_uuid
+
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            raise web.HTTPRequestRangeNotSatisfiable(headers={"Content-Range": f"bytes */{size}"})
+
+        start, end = byte_range or (0, size - 1)
+        response = web.StreamResponse(status=206 if byte_range else 200)
+        response.headers["Content-Type"] = mime_type
+        response.headers["Accept-Ranges"] = "bytes"
+        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(file_name)}"
+        response.content_length = end - start + 1
+        if byte_range:
+            response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        await response.prepare(request)
+
+        if request.method == "HEAD" or size == 0:
+            return response
+
+        metrics.ACTIVE_STREAMS.inc()
+        try:
+            if self.cache is not None:
+                chunks = self.iter_cached_range(file_data["uuid"], message, start, end)
+            else:
+                chunks = self.iter_range(message, start, end)
+            async for data in chunks:
+                # write() waits for the transport to drain, slow clients throttle the download
+                await response.write(data)
+                metrics.STREAMED_BYTES.inc(amount=len(data))
+        except ConnectionError:
+            # Client went away mid-download
+            pass
+        finally:
+            metrics.ACTIVE_STREAMS.dec()
+        return response
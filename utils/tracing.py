@@ -0,0 +1,94 @@
+import functools
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+import config
+
+# Samples kept per name for the rolling percentiles
+WINDOW = 1000
+# Spans kept per handler call for the slow-call breakdown
+MAX_SPANS = 50
+
+
+class RollingSummary:
+    """Keep the last WINDOW durations per name and report percentiles on demand"""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentiles(self, name: str) -> Dict[str, float]:
+        samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {}
+        last = len(samples) - 1
+        return {
+            "count": len(samples),
+            "p50": samples[round(last * 0.50)] * 1000,
+            "p95": samples[round(last * 0.95)] * 1000,
+            "p99": samples[round(last * 0.99)] * 1000,
+        }
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles in milliseconds for every name, slowest p95 first"""
+        summary = {name: self.percentiles(name) for name in list(self._samples)}
+        return dict(sorted(summary.items(), key=lambda item: item[1].get("p95", 0), reverse=True))
+
+
+class _Trace:
+    __slots__ = ("spans", "closed")
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+        self.closed = False
+
+
+HANDLERS = RollingSummary()
+SPANS = RollingSummary()
+_current_trace: ContextVar[Optional[_Trace]] = ContextVar("current_trace", default=None)
+
+
+def start_trace():
+    """Begin collecting spans for the current handler call, returns a reset token"""
+    return _current_trace.set(_Trace())
+
+
+def finish_trace(handler: str, seconds: float, token) -> None:
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    HANDLERS.record(handler, seconds)
+    if trace is None:
+        return
+    # Background tasks spawned by the handler inherit the trace, stop collecting for them
+    trace.closed = True
+    if seconds * 1000 >= config.SLOW_CALL_MS:
+        breakdown = ", ".join(f"{name} {span * 1000:.0f}ms" for name, span in trace.spans)
+        print(f"Slow call {handler}: {seconds * 1000:.0f}ms [{breakdown or 'no spans'}]")
+
+
+def record_span(name: str, seconds: float) -> None:
+    SPANS.record(name, seconds)
+    trace = _current_trace.get()
+    if trace is not None and not trace.closed and len(trace.spans) < MAX_SPANS:
+        trace.spans.append((name, seconds))
+
+
+def traced(name: str):
+    """Record a coroutine as a span of the handler call it runs in"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record_span(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from . import metrics
+import config
+
+
+class UserActivityTracker:
+    """
+    Debounce user upserts off the request path
+
+    A user is queued for writing at most once per USER_ACTIVITY_TTL seconds,
+    queued writes are flushed in one bulk_write by a background task.
+    """
+
+    # Every live tracker, so shutdown can flush them all
+    _instances: "weakref.WeakSet[UserActivityTracker]" = weakref.WeakSet()
+
+    def __init__(self, db, ttl: int = None, flush_interval: int = None):
+        self.db = db
+        self.ttl = ttl or config.USER_ACTIVITY_TTL
+        self.flush_interval = flush_interval or config.USER_ACTIVITY_FLUSH_INTERVAL
+        self._seen: Dict[int, float] = {}
+        self._pending: Dict[int, Tuple[Optional[str], datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+        UserActivityTracker._instances.add(self)
+
+    def touch(self, user_id: int, username: str = None) -> None:
+        """Record activity without waiting for the database"""
+        now = time.monotonic()
+        seen = self._seen.get(user_id)
+        if seen is not None and now - seen < self.ttl:
+            return
+        self._seen[user_id] = now
+        self._pending[user_id] = (username, datetime.utcnow())
+        metrics.PENDING_USER_WRITES.set(len(self._pending))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def flush(self) -> int:
+        """Write all pending users, returns how many were written"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        try:
+            await self.db.bulk_upsert_users(pending)
+        except Exception as e:
+            print(f"Error flushing user activity: {str(e)}")
+            # Keep newer entries that arrived while we were writing
+            pending.update(self._pending)
+            self._pending = pending
+            return 0
+        finally:
+            metrics.PENDING_USER_WRITES.set(len(self._pending))
+        return len(pending)
+
+    @classmethod
+    async def flush_all(cls) -> int:
+        """Stop background flushing and write everything still queued"""
+        written = 0
+        for tracker in list(cls._instances):
+            if tracker._task is not None:
+                tracker._task.cancel()
+            written += await tracker.flush()
+        return written
+
+    def _sweep(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        self._seen = {user_id: seen for user_id, seen in self._seen.items() if seen >= cutoff}
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            self._sweep()
@@ -1,8 +1,67 @@
 import asyncio
-from aiohttp import web, ClientSession, ClientTimeout
+import os
+import random
+import time
+from aiohttp import web
+from utils import metrics
+from utils.streamer import FileStreamer
+from utils.chunk_cache import ChunkCache
+import config
+from utils.http import get_session
 
-async def start_webserver():
+# Probe results are reused for this long so frequent probes don't load Mongo
+HEALTH_CACHE_SECONDS = 5
+MONGO_PING_TIMEOUT = 2
+# Spread keepalive pings by +/- this fraction of the interval
+PING_JITTER = 0.1
+PING_RETRY_MIN = 15
+
+# Outcome of the latest keepalive ping, reported by /readyz
+keepalive_state = {"last_ping_at": None, "last_status": None, "last_latency_ms": None, "failures": 0}
+
+
+class ReadinessProbe:
+    """Check Mongo and Telegram connectivity, cached for HEALTH_CACHE_SECONDS"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+        self._result = None
+
+    async def _ping_mongo(self) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.bot.db.client.admin.command("ping"), MONGO_PING_TIMEOUT)
+            return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+
+    async def _run_checks(self) -> dict:
+        mongo = await self._ping_mongo()
+        telegram = {"ok": bool(self.bot.is_connected)}
+        return {
+            "ready": mongo["ok"] and telegram["ok"],
+            "mongo": mongo,
+            "telegram": telegram,
+            "keepalive": keepalive_state,
+            "queues": {
+                "pending_deletions": metrics.PENDING_DELETIONS.value(),
+                "pending_user_writes": metrics.PENDING_USER_WRITES.value(),
+            },
+        }
+
+    async def check(self) -> dict:
+        async with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at > HEALTH_CACHE_SECONDS:
+                self._result = await self._run_checks()
+                self._checked_at = time.monotonic()
+            return self._result
+
+
+async def start_webserver(bot):
     routes = web.RouteTableDef()
+    readiness = ReadinessProbe(bot)
 
     @routes.get("/", allow_head=True)
     async def root_route_handler(request):
@@ -11,6 +70,39 @@ async def start_webserver():
         }
         return web.json_response(res)
 
+    @routes.get("/healthz", allow_head=True)
+    async def liveness_route_handler(request):
+        # The event loop answering is all liveness means
+        return web.json_response({"status": "alive"})
+
+    @routes.get("/readyz", allow_head=True)
+    async def readiness_route_handler(request):
+        result = await readiness.check()
+        return web.json_response(result, status=200 if result["ready"] else 503)
+
+    if config.HTTP_STREAMING and config.PRIVACY_MODE:
+        print("HTTP_STREAMING is ignored while PRIVACY_MODE is on")
+    elif config.HTTP_STREAMING:
+        cache = None
+        if config.STREAM_CACHE_SIZE_MB > 0:
+            # Each worker owns its folder and an equal share of the disk budget
+            cache = ChunkCache(
+                os.path.join(config.STREAM_CACHE_DIR, f"worker-{config.WORKER_INDEX}"),
+                config.STREAM_CACHE_SIZE_MB * 1024 * 1024 // max(1, config.WORKER_COUNT)
+            )
+        streamer = FileStreamer(bot, bot.db, cache=cache)
+
+        @routes.get("/dl/{uuid}", allow_head=True)
+        async def download_route_handler(request):
+            return await streamer.handle(request, request.match_info["uuid"])
+
+    @routes.get("/metrics")
+    async def metrics_route_handler(request):
+        return web.Response(
+            text=metrics.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
     async def web_server():
         web_app = web.Application(client_max_size=30000000)
         web_app.add_routes(routes)
@@ -20,17 +112,33 @@ async def start_webserver():
     await app.setup()
     await web.TCPSite(app, "0.0.0.0", 8080).start()
     print("Web server started")
+    return app
+
+def next_ping_delay(sleep_time: float, failures: int) -> float:
+    """Jittered interval, retrying sooner (backing off to the interval) after failures"""
+    delay = sleep_time if not failures else min(sleep_time, PING_RETRY_MIN * 2 ** (failures - 1))
+    return delay * random.uniform(1 - PING_JITTER, 1 + PING_JITTER)
+
 
 async def ping_server(url, sleep_time):
+    if not url:
+        print("PING_URL not set, keepalive disabled")
+        return
+
     while True:
-        await asyncio.sleep(sleep_time)
+        await asyncio.sleep(next_ping_delay(sleep_time, keepalive_state["failures"]))
+        start = time.perf_counter()
         try:
-            async with ClientSession(
-                timeout= ClientTimeout(total=10)
-            ) as session:
-                async with session.get(url) as resp:
-                    print("Pinged server with response: {}".format(resp.status))
-        except TimeoutError:
+            async with get_session().get(url) as resp:
+                keepalive_state["last_status"] = resp.status
+                keepalive_state["last_latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                keepalive_state["failures"] = 0
+                print("Pinged server with response: {}".format(resp.status))
+        except asyncio.TimeoutError:
+            keepalive_state["failures"] += 1
             print(f"Couldn't connect to the site {url}..!")
         except Exception as e:
+            keepalive_state["failures"] += 1
             print(e)
+        finally:
+            keepalive_state["last_ping_at"] = time.time()